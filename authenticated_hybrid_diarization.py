@@ -9,9 +9,10 @@ import sys
 import time
 import threading
 import queue
-import tempfile
 import wave
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 import pyaudio
@@ -19,28 +20,184 @@ import numpy as np
 from google.cloud import speech
 from google.oauth2 import service_account
 
-# Hugging Face authentication
+# Hugging Face authentication - the stored token is read once and reused
 try:
     from huggingface_hub import login, HfFolder
+    HF_TOKEN = HfFolder.get_token()
+except Exception:
+    HF_TOKEN = None
+    
+if HF_TOKEN:
+    print("✅ Hugging Face authentication found")
+else:
+    print("⚠️ Hugging Face authentication not found - run: huggingface-cli login")
+    
+try:
     import torch
     from pyannote.audio import Pipeline
     PYANNOTE_AVAILABLE = True
-    
-    # Check if user is logged in
-    try:
-        token = HfFolder.get_token()
-        if token:
-            print("✅ Hugging Face authentication found")
-        else:
-            print("⚠️ Hugging Face authentication not found - run: huggingface-cli login")
-    except:
-        print("⚠️ Hugging Face authentication not found - run: huggingface-cli login")
-        
 except ImportError as e:
     PYANNOTE_AVAILABLE = False
     print(f"❌ pyannote-audio not available: {e}")
 
+# Optional Numba acceleration for the numeric scan loops
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """Fallback when numba is missing - kernels run as plain Python"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+def empty_speaker_segments():
+    """pyannote results with no segments: (starts, ends, speaker_ids) arrays"""
+    return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int16)
+
+@njit(cache=True)
+def aggregate_speaker_times(starts, ends, spk_ids, n_speakers):
+    """Sum speaking time per speaker id and find the latest segment end"""
+    durations = np.zeros(n_speakers, dtype=np.float64)
+    total_duration = 0.0
+    for i in range(starts.shape[0]):
+        end = ends[i]
+        durations[spk_ids[i]] += end - starts[i]
+        if end > total_duration:
+            total_duration = end
+    return durations, total_duration
+
+@njit(cache=True)
+def assign_speakers(word_starts, word_ends, seg_starts, seg_ends, seg_spk):
+    """Pick each word's speaker: largest overlap, else the segment nearest the word midpoint
+    
+    Words and segments must both be sorted by start time.
+    """
+    n_words = word_starts.shape[0]
+    n_segs = seg_starts.shape[0]
+    speakers = np.zeros(n_words, dtype=np.int32)  # default to Speaker 0
+    if n_segs == 0:
+        return speakers
+        
+    # Running max of segment ends (and where it was first reached) lets the lower
+    # pointer skip segments that are already over and answers the fallback in O(1)
+    max_ends = np.empty(n_segs, dtype=np.float64)
+    argmax_ends = np.empty(n_segs, dtype=np.int64)
+    running_end = -np.inf
+    running_idx = 0
+    for j in range(n_segs):
+        if seg_ends[j] > running_end:
+            running_end = seg_ends[j]
+            running_idx = j
+        max_ends[j] = running_end
+        argmax_ends[j] = running_idx
+        
+    lo = 0
+    for i in range(n_words):
+        word_start = word_starts[i]
+        word_end = word_ends[i]
+        while lo < n_segs and max_ends[lo] <= word_start:
+            lo += 1
+            
+        # Find best matching speaker segment among those that can overlap
+        best_overlap = 0.0
+        j = lo
+        while j < n_segs and seg_starts[j] < word_end:
+            overlap = min(word_end, seg_ends[j]) - max(word_start, seg_starts[j])
+            if overlap > best_overlap:
+                best_overlap = overlap
+                speakers[i] = seg_spk[j]
+            j += 1
+            
+        # If no speaker overlap found, use temporal proximity: the only candidates are
+        # the latest-ending segment before the word and the first one starting after it
+        if best_overlap == 0.0:
+            word_mid = (word_start + word_end) / 2
+            closest_distance = np.inf
+            if j > 0:
+                k = argmax_ends[j - 1]
+                closest_distance = max(seg_starts[k] - word_mid, word_mid - seg_ends[k], 0.0)
+                speakers[i] = seg_spk[k]
+            if j < n_segs:
+                distance = max(seg_starts[j] - word_mid, word_mid - seg_ends[j], 0.0)
+                if distance < closest_distance:
+                    closest_distance = distance
+                    speakers[i] = seg_spk[j]
+            if closest_distance == 0.0:
+                # Zero-length word inside a segment - take the first such segment. Segments
+                # before max_ends reaches word_mid end too early, those after word_mid start too late
+                k = np.searchsorted(max_ends, word_mid)
+                while k < n_segs and seg_starts[k] <= word_mid:
+                    if word_mid <= seg_ends[k]:
+                        speakers[i] = seg_spk[k]
+                        break
+                    k += 1
+                    
+    return speakers
+
+@njit(cache=True)
+def assign_speakers_unsorted(word_starts, word_ends, seg_starts, seg_ends, seg_spk):
+    """assign_speakers for words and segments in any order, sorting and scattering back in one call"""
+    seg_order = np.argsort(seg_starts, kind="mergesort")  # Stable, so tie-breaks follow input order
+    word_order = np.argsort(word_starts, kind="mergesort")
+    sorted_speakers = assign_speakers(word_starts[word_order], word_ends[word_order],
+                                      seg_starts[seg_order], seg_ends[seg_order], seg_spk[seg_order])
+    speakers = np.empty_like(sorted_speakers)
+    speakers[word_order] = sorted_speakers
+    return speakers
+
+def assign_speakers_vectorized(word_starts, word_ends, seg_starts, seg_ends, seg_spk, block_size=1024):
+    """NumPy broadcast version of assign_speakers, used when numba is not installed"""
+    speakers = np.zeros(word_starts.shape[0], dtype=np.int32)  # default to Speaker 0
+    if seg_starts.shape[0] == 0:
+        return speakers
+        
+    # Blocks of words keep the (words x segments) matrices small on long files
+    for lo in range(0, word_starts.shape[0], block_size):
+        ws = word_starts[lo:lo + block_size, None]
+        we = word_ends[lo:lo + block_size, None]
+        
+        overlap = np.minimum(we, seg_ends) - np.maximum(ws, seg_starts)
+        np.maximum(overlap, 0.0, out=overlap)
+        best = overlap.argmax(axis=1)
+        
+        # Words without overlap fall back to the segment nearest their midpoint
+        no_overlap = overlap[np.arange(best.shape[0]), best] == 0.0
+        if no_overlap.any():
+            word_mid = (ws[no_overlap] + we[no_overlap]) / 2
+            distance = np.maximum(np.maximum(seg_starts - word_mid, word_mid - seg_ends), 0.0)
+            best[no_overlap] = distance.argmin(axis=1)
+            
+        speakers[lo:lo + block_size] = seg_spk[best]
+        
+    return speakers
+
+def quantize_int8(x):
+    """Symmetric int8 quantization along the last axis: returns (values, float32 scale)"""
+    scale = np.abs(x).max(axis=-1, keepdims=True).astype(np.float32) / 127.0
+    scale[scale == 0] = 1.0
+    return np.round(x / scale).astype(np.int8), scale
+
 class AuthenticatedHybridDiarization:
+    # Speaker colors shared by all transcript views, indexed by speaker_id % len
+    SPEAKER_COLORS = ("#e74c3c", "#3498db", "#2ecc71", "#f39c12", "#9b59b6", "#1abc9c")
+    OTHER_SPEAKER_COLOR = "#333333"  # Conversation view: speakers past the palette
+    # Conversation tag per palette index, plus a final shared tag for everyone else
+    SPEAKER_TAGS = tuple(f"speaker_{i}" for i in range(len(SPEAKER_COLORS))) + ("speaker_other",)
+    
+    # Live windows quieter than this RMS (int16 units) skip pyannote
+    SILENCE_RMS = 150
+    
+    # Google closes streams after ~5 minutes, so the live stream is reopened before that
+    STREAM_RESTART_SECONDS = 290
+    # How long a processed window waits for Google's final results to catch up
+    STREAM_RESULT_WAIT = 2.0
+    
+    # Cosine similarity above which a new voice is treated as an existing global speaker
+    SPEAKER_MATCH_THRESHOLD = 0.7
+    
     def __init__(self):
         # Audio configuration
         self.RATE = 16000
@@ -50,23 +207,60 @@ class AuthenticatedHybridDiarization:
         
         # Threading and control
         self.is_recording = False
-        self.audio_queue = queue.Queue()
-        self.pyaudio_instance = None
+        self.audio_queue = queue.SimpleQueue()  # Single C-level lock per put from the audio callback
+        self.google_audio_queue = queue.SimpleQueue()  # Same chunks, streamed to Google as they arrive
+        self.pyaudio_instance = None  # Created on first start, then kept; only streams are reopened
         self.stream = None
+        self.capture_thread = None
         self.processing_thread = None
+        self.google_stream_thread = None
+        
+        # Double-buffered PCM slots: capture fills one while the other is processed
+        self.buffer_duration = 5  # seconds
+        slot_samples = int(self.buffer_duration * self.RATE / self.CHUNK) * self.CHUNK  # whole chunks only
+        self._pcm_slots = [np.empty(slot_samples, dtype=np.int16) for _ in range(2)]
+        self._slot_lengths = [0, 0]
+        self._slot_offsets = [0, 0]  # Sample position of each slot since recording started
+        self._slot_ready = [threading.Event(), threading.Event()]
+        self._slot_free = [threading.Event(), threading.Event()]
+        self._capture_done = threading.Event()  # Set once capture has handed over its last slot
+        self._float_buf = np.empty(slot_samples, dtype=np.float32)  # Live pyannote input, reused per window
+        
+        # Final Google streaming results (absolute word times) waiting for their window
+        self._stream_cond = threading.Condition()
+        self._stream_results = []
+        self._stream_heard_until = 0.0
+        self._stream_done = False
+        
+        # Runs pyannote on uploaded files while Google transcribes them (live Google results stream instead)
+        self._executor = ThreadPoolExecutor(max_workers=2)
         
         # Services
         self.speech_client = None
         self.diarization_pipeline = None
+        self.use_fp16 = False  # pyannote models cast to half precision on GPU
         
         # Data tracking
         self.segment_counter = 0
-        self.speaker_stats = {}
+        self.speaker_stats = np.zeros(8, dtype=np.int64)  # Word counts indexed by global speaker ID, grown on demand
+        self._total_words = 0  # Running sum of speaker_stats values
         
         # Persistent speaker tracking across segments
         self.global_speaker_mapping = {}  # Maps pyannote labels to consistent global IDs
         self.next_global_speaker_id = 0
-        self.speaker_voice_profiles = {}  # Store voice characteristics for each global speaker
+        # Voice profiles: unit-length embedding centroids stacked as int8 rows, matched with one matmul
+        self._centroids_q = None  # (K, D) int8, created from the first embedding
+        self._centroid_scales = None  # (K, 1) float32 per-row scale
+        self._centroid_ids = []  # Global speaker ID of each row
+        self._centroid_counts = []  # Segments averaged into each row
+        self._centroid_lock = threading.Lock()  # Live windows and uploads match speakers from different threads
+        
+        # Log lines waiting to be written to the log widget, as (time.time(), message)
+        self._log_pending = deque()
+        self._timestamp_cache = (None, "")  # (whole second, "%H:%M:%S")
+        
+        # Google RecognitionConfig per (language, sample rate), built on first use
+        self._config_cache = {}
         
         # Setup GUI and services
         self.setup_gui()
@@ -155,6 +349,10 @@ class AuthenticatedHybridDiarization:
         )
         language_combo.pack()
         
+        # Mirror the selection into a plain attribute so worker threads never call into Tk
+        self._language = self.language_var.get()
+        self.language_var.trace_add("write", lambda *_: setattr(self, "_language", self.language_var.get()))
+        
         # Speaker statistics
         stats_frame = tk.Frame(self.root, bg="white", relief="solid", bd=1)
         stats_frame.pack(fill=tk.X, padx=20, pady=(10, 5))
@@ -179,6 +377,14 @@ class AuthenticatedHybridDiarization:
         )
         self.transcript_text.pack(fill=tk.BOTH, expand=True, pady=10)
         
+        # Register text tags once instead of on every insert
+        for color_index, color in enumerate(self.SPEAKER_COLORS):
+            self.transcript_text.tag_config(f"speaker_{color_index}_file", foreground=color, font=("Arial", 11, "bold"))
+        for tag, color in zip(self.SPEAKER_TAGS, self.SPEAKER_COLORS + (self.OTHER_SPEAKER_COLOR,)):
+            self.transcript_text.tag_config(tag, foreground=color)
+        self.transcript_text.tag_config("speaker_0_default", foreground="#e74c3c", font=("Arial", 11, "bold"))
+        self.transcript_text.tag_config("speaker_activity", foreground="#666666", font=("Arial", 11, "italic"))
+        
         # Details tab
         details_frame = ttk.Frame(notebook)
         notebook.add(details_frame, text="🔍 Processing Details")
@@ -216,6 +422,11 @@ class AuthenticatedHybridDiarization:
         )
         self.log_text.pack(fill=tk.X, padx=20, pady=(0, 20))
         
+        # Write queued log lines in batches on the Tk thread
+        self.root.after(100, self.log_flush_loop)
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
     def setup_services(self):
         """Initialize Google and pyannote services with authentication"""
         # Setup Google Cloud
@@ -236,25 +447,20 @@ class AuthenticatedHybridDiarization:
             self.google_status.config(text="Google: ❌ Error", fg="red")
             self.log_message(f"❌ Google setup error: {e}")
             
-        # Check Hugging Face authentication
-        try:
-            from huggingface_hub import HfFolder
-            token = HfFolder.get_token()
-            if token:
-                self.hf_status.config(text="HuggingFace: ✅ Authenticated", fg="green")
-                self.log_message("✅ Hugging Face authentication verified")
-            else:
-                self.hf_status.config(text="HuggingFace: ❌ Not logged in", fg="red")
-                self.log_message("❌ Hugging Face not authenticated - run: huggingface-cli login")
-        except Exception as e:
-            self.hf_status.config(text="HuggingFace: ❌ Error", fg="red")
-            self.log_message(f"❌ HuggingFace check error: {e}")
+        # Check Hugging Face authentication (token cached at import)
+        if HF_TOKEN:
+            self.hf_status.config(text="HuggingFace: ✅ Authenticated", fg="green")
+            self.log_message("✅ Hugging Face authentication verified")
+        else:
+            self.hf_status.config(text="HuggingFace: ❌ Not logged in", fg="red")
+            self.log_message("❌ Hugging Face not authenticated - run: huggingface-cli login")
             
         # Setup pyannote with authentication
         if PYANNOTE_AVAILABLE:
             try:
                 self.pyannote_status.config(text="pyannote: 🔄 Loading...", fg="orange")
                 self.log_message("🔄 Loading pyannote diarization pipeline...")
+                self.flush_log()
                 self.root.update()
                 
                 # Try to load with authentication
@@ -262,7 +468,7 @@ class AuthenticatedHybridDiarization:
                     # First try with stored token
                     self.diarization_pipeline = Pipeline.from_pretrained(
                         "pyannote/speaker-diarization-3.1",
-                        use_auth_token=True  # Use stored HF token
+                        use_auth_token=HF_TOKEN  # Token cached at import
                     )
                 except Exception as auth_error:
                     self.log_message(f"⚠️ Auth token method failed: {auth_error}")
@@ -274,12 +480,16 @@ class AuthenticatedHybridDiarization:
                 # Use GPU if available
                 if torch.cuda.is_available():
                     self.diarization_pipeline = self.diarization_pipeline.to(torch.device("cuda"))
-                    self.pyannote_status.config(text="pyannote: ✅ Ready (GPU)", fg="green")
-                    self.log_message("✅ pyannote loaded with GPU acceleration")
+                    precision = "FP16" if self.enable_half_precision() else "FP32"
+                    self.pyannote_status.config(text=f"pyannote: ✅ Ready (GPU {precision})", fg="green")
+                    self.log_message(f"✅ pyannote loaded with GPU acceleration ({precision})")
                 else:
                     self.pyannote_status.config(text="pyannote: ✅ Ready (CPU)", fg="green")
                     self.log_message("✅ pyannote loaded with CPU")
                     
+                # Pay the cold-start cost now instead of on the first live window
+                threading.Thread(target=self.warmup_pipeline, daemon=True).start()
+                    
             except Exception as e:
                 self.pyannote_status.config(text="pyannote: ❌ Error", fg="red")
                 self.log_message(f"❌ pyannote setup error: {e}")
@@ -290,51 +500,163 @@ class AuthenticatedHybridDiarization:
             self.pyannote_status.config(text="pyannote: ❌ Not installed", fg="red")
             self.log_message("❌ pyannote-audio not available")
             
-    def log_message(self, message):
-        """Add message to log"""
-        timestamp = time.strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
-        print(log_entry.strip())
+    def enable_half_precision(self):
+        """Cast pyannote's segmentation/embedding models to FP16, falling back to FP32 on failure"""
+        models = []
+        for inference in (getattr(self.diarization_pipeline, "_segmentation", None),
+                          getattr(self.diarization_pipeline, "_embedding", None)):
+            for attr in ("model", "model_"):
+                model = getattr(inference, attr, None)
+                if isinstance(model, torch.nn.Module):
+                    models.append(model)
+                    break
+                    
+        if not models:
+            self.log_message("⚠️ No pyannote models found to cast - staying on FP32")
+            return False
+            
+        try:
+            for model in models:
+                model.half()
+            # Run one second of silence through to make sure the half models actually work
+            self.use_fp16 = True
+            self.run_diarization({"waveform": torch.zeros(1, self.RATE), "sample_rate": self.RATE})
+        except Exception as e:
+            self.log_message(f"⚠️ FP16 not supported by pyannote models, staying on FP32: {e}")
+            for model in models:
+                model.float()
+            self.use_fp16 = False
+            
+        return self.use_fp16
+        
+    def warmup_pipeline(self):
+        """Compile (where supported) and warm up pyannote with a silent window"""
+        segmentation = getattr(self.diarization_pipeline, "_segmentation", None)
+        eager_model = getattr(segmentation, "model", None)
         
+        if hasattr(torch, "compile") and isinstance(eager_model, torch.nn.Module):
+            try:
+                segmentation.model = torch.compile(eager_model, mode="reduce-overhead")
+            except Exception as e:
+                self.log_message(f"⚠️ torch.compile not available for pyannote: {e}")
+                
+        silence = {"waveform": torch.zeros(1, self.RATE * self.buffer_duration), "sample_rate": self.RATE}
+        start = time.time()
+        try:
+            self.run_diarization(silence)
+        except Exception as e:
+            if segmentation is None or segmentation.model is eager_model:
+                self.log_message(f"⚠️ pyannote warmup failed: {e}")
+                return
+            # Compilation happens lazily on the first call - fall back to eager mode
+            self.log_message(f"⚠️ Compiled pyannote model failed, using eager mode: {e}")
+            segmentation.model = eager_model
+            try:
+                self.run_diarization(silence)
+            except Exception as e:
+                self.log_message(f"⚠️ pyannote warmup failed: {e}")
+                return
+                
+        # Live windows all have the same length, so let cuDNN pick and keep the fastest kernels
+        if torch.cuda.is_available():
+            torch.backends.cudnn.benchmark = True
+            
+        self.log_message(f"🔥 pyannote warmed up in {time.time() - start:.1f}s")
+        
+    def run_diarization(self, audio_source, **kwargs):
+        """Run the diarization pipeline without autograd, at the configured precision"""
+        with torch.inference_mode():
+            if self.use_fp16:
+                with torch.autocast(device_type="cuda", dtype=torch.float16):
+                    return self.diarization_pipeline(audio_source, **kwargs)
+            return self.diarization_pipeline(audio_source, **kwargs)
+        
+    def timestamp(self, now):
+        """"%H:%M:%S" for a time.time() value, formatted at most once per second"""
+        second, text = self._timestamp_cache
+        if second != int(now):
+            text = time.strftime("%H:%M:%S", time.localtime(now))
+            self._timestamp_cache = (int(now), text)
+        return text
+        
+    def log_message(self, message):
+        """Print message now and queue it for the log widget (written every 100 ms)"""
+        now = time.time()
+        print(f"[{self.timestamp(now)}] {message}")  # Console output is not held back by the Tk tick
+        self._log_pending.append((now, message))
+        
+    def flush_log(self):
+        """Write all queued log lines with a single insert, each stamped with its own log time"""
+        lines = []
+        while self._log_pending:
+            now, message = self._log_pending.popleft()
+            lines.append(f"[{self.timestamp(now)}] {message}\n")
+        if lines:
+            self.log_text.insert(tk.END, "".join(lines))
+            self.log_text.see(tk.END)
+            
+    def log_flush_loop(self):
+        """Flush the log and reschedule on the Tk main loop"""
+        self.flush_log()
+        self.root.after(100, self.log_flush_loop)
+        
+    def append_text(self, widget, text):
+        """Append text to a widget with one insert and one scroll, run on the Tk event loop"""
+        if text:
+            self.root.after_idle(lambda: (widget.insert(tk.END, text), widget.see(tk.END)))
+            
     def clear_all(self):
         """Clear all displays"""
         self.transcript_text.delete(1.0, tk.END)
         self.google_text.delete(1.0, tk.END)
         self.pyannote_text.delete(1.0, tk.END)
-        self.speaker_stats.clear()
+        self.reset_speaker_stats()
         self.update_speaker_stats()
         self.log_message("🗑️ All displays cleared")
         
     def update_speaker_stats(self):
         """Update speaker statistics display"""
-        if not self.speaker_stats:
+        active = np.nonzero(self.speaker_stats)[0]
+        if not len(active):
             self.stats_label.config(text="👥 Speaker Statistics: No speakers detected")
             return
             
-        total_words = sum(self.speaker_stats.values())
-        stats_text = f"👥 Speaker Statistics: "
-        
-        for speaker_id in sorted(self.speaker_stats.keys()):
-            word_count = self.speaker_stats[speaker_id]
-            if total_words > 0:
-                percentage = (word_count / total_words) * 100
-                stats_text += f"Speaker {speaker_id}: {word_count} words ({percentage:.1f}%) | "
-            else:
-                stats_text += f"Speaker {speaker_id}: {word_count} words | "
-                
-        # Remove trailing " | "
-        stats_text = stats_text.rstrip(" | ")
-        self.stats_label.config(text=stats_text)
+        counts = self.speaker_stats[active]
+        percentages = counts * (100.0 / self._total_words)
+        parts = [
+            f"Speaker {speaker_id}: {word_count} words ({percentage:.1f}%)"
+            for speaker_id, word_count, percentage in zip(active.tolist(), counts.tolist(), percentages.tolist())
+        ]
+        self.stats_label.config(text="👥 Speaker Statistics: " + " | ".join(parts))
+        
+    def speaker_stats_slot(self, speaker_id):
+        """Grow speaker_stats so speaker_id has a slot, and return the ID"""
+        if speaker_id >= len(self.speaker_stats):
+            grown = np.zeros(max(speaker_id + 1, 2 * len(self.speaker_stats)), dtype=np.int64)
+            grown[:len(self.speaker_stats)] = self.speaker_stats
+            self.speaker_stats = grown
+        return speaker_id
+        
+    def add_speaker_words(self, speaker_id, words):
+        """Add words to a speaker's count and the running total"""
+        self.speaker_stats[self.speaker_stats_slot(speaker_id)] += words
+        self._total_words += words
+        
+    def reset_speaker_stats(self):
+        """Zero all word counts"""
+        self.speaker_stats.fill(0)
+        self._total_words = 0
         
     def reset_speakers(self):
         """Reset speaker tracking - all speakers will be re-detected"""
-        self.global_speaker_mapping.clear()
-        self.next_global_speaker_id = 0
-        self.speaker_voice_profiles.clear()
-        self.speaker_stats.clear()
+        with self._centroid_lock:
+            self.global_speaker_mapping.clear()
+            self.next_global_speaker_id = 0
+            self._centroids_q = None
+            self._centroid_scales = None
+            self._centroid_ids = []
+            self._centroid_counts = []
+        self.reset_speaker_stats()
         self.log_message("🔄 Speaker tracking reset - next speakers will get new IDs starting from 0")
         
     def upload_audio_file(self):
@@ -372,13 +694,29 @@ class AuthenticatedHybridDiarization:
         try:
             # Update status
             self.log_message("🔄 Analyzing audio file...")
-            self.root.update()
+            
+            # Decode 16-bit mono WAVs once and share the PCM between both services
+            frames, sample_rate = (None, None)
+            if file_path.lower().endswith('.wav'):
+                frames, sample_rate = self.load_wav_frames(file_path)
+            pcm = np.frombuffer(frames, dtype=np.int16) if frames is not None else None  # View, no copy
+            
+            # Process with pyannote (supports multiple formats) alongside Google
+            self.log_message("👤 Running pyannote speaker diarization...")
+            if pcm is not None:
+                pyannote_future = self._executor.submit(self.process_pyannote, pcm, sample_rate)
+            else:
+                pyannote_future = self._executor.submit(self.process_pyannote, file_path)
             
             # Process with Google Speech (if supported format)
             google_results = []
             if file_path.lower().endswith('.wav'):
                 try:
-                    google_results = self.process_google(file_path)
+                    # pyannote keeps running meanwhile
+                    if pcm is not None:
+                        google_results = self.process_google(frames, sample_rate)  # Same bytes pyannote reads
+                    else:
+                        google_results = self.process_google(file_path)
                     self.log_message(f"🗣️ Google: {len(google_results)} transcription results")
                 except Exception as e:
                     self.log_message(f"⚠️ Google processing failed: {e}")
@@ -388,14 +726,12 @@ class AuthenticatedHybridDiarization:
             else:
                 self.log_message("⚠️ Google Speech only supports WAV files - skipping transcription")
             
-            # Process with pyannote (supports multiple formats)
-            self.log_message("👤 Running pyannote speaker diarization...")
-            pyannote_results = self.process_pyannote(file_path)
+            pyannote_results = pyannote_future.result()
             
             # Generate summary
-            if pyannote_results:
-                unique_speakers = set(speaker_id for _, _, speaker_id in pyannote_results)
-                total_duration = max(end_time for _, end_time, _ in pyannote_results) if pyannote_results else 0
+            if len(pyannote_results[2]):
+                speaker_times, total_duration = self.speaker_time_totals(pyannote_results)
+                unique_speakers = speaker_times.keys()
                 
                 self.log_message("=" * 50)
                 self.log_message("📊 AUDIO FILE ANALYSIS SUMMARY")
@@ -403,14 +739,9 @@ class AuthenticatedHybridDiarization:
                 self.log_message(f"📁 File: {os.path.basename(file_path)}")
                 self.log_message(f"⏱️ Duration: {total_duration:.1f} seconds")
                 self.log_message(f"👥 Speakers detected: {len(unique_speakers)}")
-                self.log_message(f"🎯 Speaker segments: {len(pyannote_results)}")
+                self.log_message(f"🎯 Speaker segments: {len(pyannote_results[2])}")
                 
                 # Speaker time breakdown
-                speaker_times = {}
-                for start_time, end_time, speaker_id in pyannote_results:
-                    duration = end_time - start_time
-                    speaker_times[speaker_id] = speaker_times.get(speaker_id, 0) + duration
-                
                 for speaker_id in sorted(speaker_times.keys()):
                     duration = speaker_times[speaker_id]
                     percentage = (duration / total_duration * 100) if total_duration > 0 else 0
@@ -419,135 +750,140 @@ class AuthenticatedHybridDiarization:
                 self.log_message("=" * 50)
                 
                 # Combine with Google results if available
+                # Widgets are only touched on the Tk thread
                 if google_results:
                     combined_results = self.combine_results(google_results, pyannote_results)
-                    self.display_results(combined_results)
+                    self.root.after_idle(self.display_results, combined_results)
                 else:
                     # Display pyannote-only results
-                    self.display_pyannote_only_results(pyannote_results, file_path)
+                    self.root.after_idle(self.display_pyannote_only_results, pyannote_results, file_path)
                     
             else:
                 self.log_message("❌ No speakers detected in the audio file")
                 
         except Exception as e:
             self.log_message(f"❌ Error processing file: {e}")
-            messagebox.showerror("Processing Error", f"Failed to process audio file:\n{e}")
+            self.root.after_idle(messagebox.showerror, "Processing Error", f"Failed to process audio file:\n{e}")
+            
+    def load_wav_frames(self, file_path):
+        """Read a 16-bit mono WAV's raw frames, or (None, None) if it needs decoding elsewhere"""
+        try:
+            with wave.open(file_path, 'rb') as wav_file:
+                if wav_file.getsampwidth() != 2 or wav_file.getnchannels() != 1:
+                    return None, None
+                sample_rate = wav_file.getframerate()
+                frames = wav_file.readframes(wav_file.getnframes())
+            self.log_message(f"🔍 Detected sample rate: {sample_rate} Hz")
+            return frames, sample_rate
+        except Exception as e:
+            self.log_message(f"⚠️ Could not read WAV in memory, falling back to file path: {e}")
+            return None, None
             
     def display_pyannote_only_results(self, pyannote_results, file_path):
         """Display results when only pyannote data is available"""
         timestamp = time.strftime("%H:%M:%S")
-        
-        # Group by speaker
-        speaker_segments = {}
-        for start_time, end_time, speaker_id in pyannote_results:
-            if speaker_id not in speaker_segments:
-                speaker_segments[speaker_id] = []
-            speaker_segments[speaker_id].append((start_time, end_time))
+        starts, ends, speaker_ids = pyannote_results
         
         # Display in transcript area with speaker colors
         self.transcript_text.insert(tk.END, f"[{timestamp}] 📁 Audio File: {os.path.basename(file_path)}\n")
-        self.transcript_text.insert(tk.END, f"👥 {len(speaker_segments)} speakers detected by pyannote\n\n")
+        self.transcript_text.insert(tk.END, f"👥 {len(np.unique(speaker_ids))} speakers detected by pyannote\n\n")
         
-        # Speaker colors
-        speaker_colors = {0: "#e74c3c", 1: "#3498db", 2: "#2ecc71", 3: "#f39c12", 4: "#9b59b6", 5: "#1abc9c"}
+        # Timeline of speaker changes, sorted by start time
+        order = np.argsort(starts, kind="stable")
         
-        # Create timeline of speaker changes
-        all_segments = []
-        for speaker_id, segments in speaker_segments.items():
-            for start, end in segments:
-                all_segments.append((start, end, speaker_id))
-        
-        # Sort by start time
-        all_segments.sort(key=lambda x: x[0])
-        
-        # Display timeline
-        for i, (start, end, speaker_id) in enumerate(all_segments):
+        # Build the whole timeline first, tracking each speaker's character ranges
+        base_index = self.transcript_text.index("end-1c")
+        lines = []
+        speaker_ranges = {}
+        offset = 0
+        for start, end, speaker_id in zip(starts[order].tolist(), ends[order].tolist(), speaker_ids[order].tolist()):
             duration = end - start
-            color = speaker_colors.get(speaker_id, "#333333")
-            
-            # Insert speaker timeline entry
-            start_pos = self.transcript_text.index(tk.END)
             text = f"[{start:.1f}s-{end:.1f}s] Speaker {speaker_id}: {duration:.1f}s of speech\n"
-            self.transcript_text.insert(tk.END, text)
-            end_pos = self.transcript_text.index(tk.END + "-1c")
+            speaker_ranges.setdefault(speaker_id, []).extend(
+                (f"{base_index}+{offset}c", f"{base_index}+{offset + len(text) - 1}c"))
+            lines.append(text)
+            offset += len(text)
             
-            # Apply color formatting
-            self.transcript_text.tag_add(f"speaker_{speaker_id}_file", start_pos, end_pos)
-            self.transcript_text.tag_config(f"speaker_{speaker_id}_file", 
-                                           foreground=color, font=("Arial", 11, "bold"))
+        # Display timeline with one insert and one tag_add per speaker
+        self.transcript_text.insert(tk.END, "".join(lines))
+        for speaker_id, ranges in speaker_ranges.items():
+            self.transcript_text.tag_add(f"speaker_{speaker_id % len(self.SPEAKER_COLORS)}_file", *ranges)
         
         self.transcript_text.insert(tk.END, "\n💡 Note: Transcription not available - only speaker diarization shown\n")
         self.transcript_text.insert(tk.END, "💡 For transcription, ensure audio is 16kHz WAV format and language is set correctly\n\n")
         self.transcript_text.see(tk.END)
         
         # Update speaker stats (use segment count as approximation)
-        for speaker_id in speaker_segments:
-            segments = speaker_segments[speaker_id]
-            total_duration = sum(end - start for start, end in segments)
+        speaker_times, _ = self.speaker_time_totals(pyannote_results)
+        for speaker_id, total_duration in speaker_times.items():
             # Estimate words (rough approximation: 2 words per second)
             estimated_words = max(1, int(total_duration * 2))
-            self.speaker_stats[speaker_id] = estimated_words
+            self.add_speaker_words(speaker_id, estimated_words - int(self.speaker_stats[self.speaker_stats_slot(speaker_id)]))
             
         # Update the statistics display
         self.update_speaker_stats()
         
+    def speaker_time_totals(self, pyannote_results):
+        """Return ({speaker_id: seconds}, latest end time) for pyannote (starts, ends, speaker_ids)"""
+        starts, ends, speaker_ids = pyannote_results
+        if not len(speaker_ids):
+            return {}, 0.0
+        durations, total_duration = aggregate_speaker_times(starts, ends, speaker_ids, int(speaker_ids.max()) + 1)
+        return {int(sid): float(durations[sid]) for sid in np.unique(speaker_ids)}, float(total_duration)
+        
     def display_google_only_results(self, google_results):
         """Display results when only Google has transcription (no speakers detected)"""
         timestamp = time.strftime("%H:%M:%S")
+        lines = []
         
         for result in google_results:
             transcript = result['transcript']
             confidence = result.get('confidence', 0.0)
             
             # Assign to default Speaker 0
-            self.speaker_stats[0] = self.speaker_stats.get(0, 0) + len(transcript.split())
+            self.add_speaker_words(0, len(transcript.split()))
+            lines.append(f"[{timestamp}] [Speaker 0] {transcript} ({confidence:.0%})\n")
             
-            # Display with default speaker
-            text = f"[{timestamp}] [Speaker 0] {transcript} ({confidence:.0%})\n"
-            self.transcript_text.insert(tk.END, text)
-            
-            # Apply default speaker color
-            start_index = self.transcript_text.index(f"end-{len(text)}c")
-            end_index = self.transcript_text.index("end-1c")
-            self.transcript_text.tag_add("speaker_0_default", start_index, end_index)
-            self.transcript_text.tag_config("speaker_0_default", 
-                                           foreground="#e74c3c", font=("Arial", 11, "bold"))
+        # Display with default speaker color - every line shares one tag, so one range covers it
+        start_index = self.transcript_text.index(tk.END + "-1c")
+        self.transcript_text.insert(tk.END, "".join(lines))
+        end_index = self.transcript_text.index(tk.END + "-1c")
+        self.transcript_text.tag_add("speaker_0_default", start_index, end_index)
             
         self.transcript_text.see(tk.END)
         self.update_speaker_stats()
         
     def display_pyannote_only_live_results(self, pyannote_results):
         """Display live results when only pyannote detects speakers (no transcription)"""
-        print(f"🎯 DEBUG: display_pyannote_only_live_results called with {len(pyannote_results)} results")
+        starts, ends, speaker_ids = pyannote_results
+        print(f"🎯 DEBUG: display_pyannote_only_live_results called with {len(speaker_ids)} results")
         timestamp = time.strftime("%H:%M:%S")
         
         # Group by speaker and show active speakers
-        active_speakers = set(speaker_id for _, _, speaker_id in pyannote_results)
+        active_speakers = np.unique(speaker_ids).tolist()
         print(f"🎯 DEBUG: Active speakers detected: {active_speakers}")
         
         if active_speakers:
-            speaker_list = ", ".join(f"Speaker {sid}" for sid in sorted(active_speakers))
-            duration = max(end - start for start, end, _ in pyannote_results) if pyannote_results else 0
+            speaker_list = ", ".join(f"Speaker {sid}" for sid in active_speakers)
+            duration = float((ends - starts).max())
             
             # Show speaker activity without transcription
             text = f"[{timestamp}] 🎤 Active: {speaker_list} (speaking detected, {duration:.1f}s)\n"
             print(f"🎯 DEBUG: Inserting text: {text.strip()}")
+            start_index = self.transcript_text.index(tk.END + "-1c")
             self.transcript_text.insert(tk.END, text)
+            end_index = self.transcript_text.index(tk.END + "-1c")
             print(f"🎯 DEBUG: Text inserted, current text widget size: {self.transcript_text.index(tk.END)}")
             
             # Update speaker stats (estimate words based on duration)
-            for speaker_id in active_speakers:
-                speaker_duration = sum(end - start for start, end, sid in pyannote_results if sid == speaker_id)
+            speaker_times, _ = self.speaker_time_totals(pyannote_results)
+            for speaker_id, speaker_duration in speaker_times.items():
                 estimated_words = max(1, int(speaker_duration * 2))  # ~2 words per second
-                self.speaker_stats[speaker_id] = self.speaker_stats.get(speaker_id, 0) + estimated_words
+                self.add_speaker_words(speaker_id, estimated_words)
                 print(f"🎯 DEBUG: Updated speaker {speaker_id} stats: +{estimated_words} words, total: {self.speaker_stats[speaker_id]}")
                 
             # Apply neutral color for speaker activity
-            start_index = self.transcript_text.index(f"end-{len(text)}c")
-            end_index = self.transcript_text.index("end-1c")
             self.transcript_text.tag_add("speaker_activity", start_index, end_index)
-            self.transcript_text.tag_config("speaker_activity", 
-                                           foreground="#666666", font=("Arial", 11, "italic"))
             print(f"🎯 DEBUG: Applied styling from {start_index} to {end_index}")
         
         self.transcript_text.see(tk.END)
@@ -572,7 +908,13 @@ class AuthenticatedHybridDiarization:
             return
             
         try:
-            self.pyaudio_instance = pyaudio.PyAudio()
+            # Fresh queues, so chunks left over from the last session don't shift the first window
+            self.audio_queue = queue.SimpleQueue()
+            self.google_audio_queue = queue.SimpleQueue()
+            
+            # PortAudio is initialised here so a missing audio device is reported, not fatal at startup
+            if self.pyaudio_instance is None:
+                self.pyaudio_instance = pyaudio.PyAudio()
             self.stream = self.pyaudio_instance.open(
                 format=self.FORMAT,
                 channels=self.CHANNELS,
@@ -582,12 +924,32 @@ class AuthenticatedHybridDiarization:
                 stream_callback=self.audio_callback
             )
             
+            # Both slots start empty and available for capture
+            for slot in range(2):
+                self._slot_ready[slot].clear()
+                self._slot_free[slot].set()
+            self._capture_done.clear()
+                
+            # Fresh Google stream state
+            with self._stream_cond:
+                self._stream_results = []
+                self._stream_heard_until = 0.0
+                self._stream_done = False
+            
             self.is_recording = True
             self.stream.start_stream()
             
             self.toggle_button.config(text="🛑 Stop Recording", bg="#f44336")
             
-            # Start processing thread
+            # Start Google streaming, capture and processing threads
+            self.google_stream_thread = threading.Thread(target=self.google_stream_worker)
+            self.google_stream_thread.daemon = True
+            self.google_stream_thread.start()
+            
+            self.capture_thread = threading.Thread(target=self.capture_worker)
+            self.capture_thread.daemon = True
+            self.capture_thread.start()
+            
             self.processing_thread = threading.Thread(target=self.processing_worker)
             self.processing_thread.daemon = True
             self.processing_thread.start()
@@ -598,124 +960,284 @@ class AuthenticatedHybridDiarization:
             self.log_message(f"❌ Recording start error: {e}")
             
     def stop_recording(self):
-        """Stop recording"""
+        """Stop recording - the workers wind down in the background while Tk keeps running"""
         self.is_recording = False
         
         if self.stream:
             self.stream.stop_stream()
             self.stream.close()
+            self.stream = None
             
-        if self.pyaudio_instance:
-            self.pyaudio_instance.terminate()
-            
-        if self.processing_thread and self.processing_thread.is_alive():
-            self.processing_thread.join(timeout=2)
+        # No restart until the final window is processed and every worker has exited
+        self.toggle_button.config(text="⏳ Stopping...", state=tk.DISABLED)
+        self.finish_stop_recording()
+        
+    def finish_stop_recording(self):
+        """Poll the worker threads from the Tk loop and restore the button once they have exited"""
+        workers = (self.google_stream_thread, self.capture_thread, self.processing_thread)
+        if any(thread and thread.is_alive() for thread in workers):
+            self.root.after(100, self.finish_stop_recording)
+            return
             
-        self.toggle_button.config(text="🎙️ Start Recording", bg="#4CAF50")
+        self.toggle_button.config(text="🎙️ Start Recording", bg="#4CAF50", state=tk.NORMAL)
         self.log_message("🛑 Recording stopped")
         
     def audio_callback(self, in_data, frame_count, time_info, status):
         """Callback for audio stream"""
         if self.is_recording:
             self.audio_queue.put(in_data)
+            self.google_audio_queue.put(in_data)
         return (None, pyaudio.paContinue)
         
-    def processing_worker(self):
-        """Process audio chunks with both Google and pyannote"""
-        audio_buffer = []
-        buffer_duration = 5  # seconds
-        max_chunks = int(buffer_duration * self.RATE / self.CHUNK)
-        
-        while self.is_recording:
-            try:
-                # Collect audio data
-                while len(audio_buffer) < max_chunks and self.is_recording:
+    def capture_worker(self):
+        """Drain audio chunks into alternating PCM slots for the processing thread"""
+        try:
+            slot = 0
+            captured_samples = 0
+            leftover = np.empty(0, dtype=np.int16)  # Tail of a chunk that overflowed the last slot
+            
+            while self.is_recording:
+                # Wait until the processing thread has released this slot
+                if not self._slot_free[slot].wait(timeout=0.1):
+                    continue
+                    
+                pcm_buf = self._pcm_slots[slot]
+                capacity = len(pcm_buf)
+                
+                # Google has already streamed the overflow, so it opens this slot instead of being dropped
+                idx = min(len(leftover), capacity)
+                pcm_buf[:idx] = leftover[:idx]
+                leftover = leftover[idx:]
+                
+                # Collect audio data straight into the preallocated slot
+                while idx < capacity and self.is_recording:
                     try:
                         chunk = self.audio_queue.get(timeout=0.1)
-                        audio_buffer.append(chunk)
                     except queue.Empty:
                         continue
-                        
-                if not audio_buffer:
-                    continue
+                    samples = np.frombuffer(chunk, dtype=np.int16)
+                    n = min(len(samples), capacity - idx)
+                    pcm_buf[idx:idx + n] = samples[:n]
+                    leftover = samples[n:]
+                    idx += n
                     
-                # Create temporary file
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                    temp_filename = temp_file.name
+                if not idx:
+                    continue
                     
-                # Write audio to file
-                with wave.open(temp_filename, 'wb') as wf:
-                    wf.setnchannels(self.CHANNELS)
-                    wf.setsampwidth(self.pyaudio_instance.get_sample_size(self.FORMAT))
-                    wf.setframerate(self.RATE)
-                    for chunk in audio_buffer:
-                        wf.writeframes(chunk)
+                # Hand the filled slot over and switch to the other one
+                self._slot_lengths[slot] = idx
+                self._slot_offsets[slot] = captured_samples
+                captured_samples += idx
+                self._slot_free[slot].clear()
+                self._slot_ready[slot].set()
+                slot ^= 1
+        finally:
+            # Processing may exit once this is set and no slot is left ready
+            self._capture_done.set()
+            
+    def processing_worker(self):
+        """Process filled PCM slots with both Google and pyannote"""
+        slot = 0
+        
+        # Keep going after stop until capture has finished and the last handed-over slot is processed.
+        # Capture sets a slot ready before _capture_done, so once done is seen, the ready check is final
+        while not self._capture_done.is_set() or self._slot_ready[slot].is_set():
+            if not self._slot_ready[slot].wait(timeout=0.1):
+                continue
                 
-                # Process with both services
-                google_results = self.process_google(temp_filename)
-                pyannote_results = self.process_pyannote(temp_filename)
+            try:
+                # Keep the audio in memory - no temporary WAV round-trip
+                pcm = self._pcm_slots[slot][:self._slot_lengths[slot]]
+                window_start = self._slot_offsets[slot] / self.RATE
+                window_end = window_start + len(pcm) / self.RATE
+                
+                # Diarize this window (skipped on silence) while Google's stream catches up
+                rms = float(np.sqrt(np.mean(np.square(pcm, dtype=np.float32))))
+                if rms < self.SILENCE_RMS:
+                    self.log_message(f"🔇 Silent window (RMS {rms:.0f}) - skipping pyannote")
+                    pyannote_results = empty_speaker_segments()
+                else:
+                    pyannote_results = self.process_pyannote(pcm, out=self._float_buf)
+                google_results = self.take_stream_results(window_start, window_end)
                 
                 # Debug: Log what pyannote detected
-                if pyannote_results:
-                    unique_speakers = set(speaker_id for _, _, speaker_id in pyannote_results)
-                    self.log_message(f"🔍 pyannote detected {len(unique_speakers)} unique speakers: {sorted(unique_speakers)}")
+                segment_count = len(pyannote_results[2])
+                if segment_count:
+                    unique_speakers = np.unique(pyannote_results[2])
+                    self.log_message(f"🔍 pyannote detected {len(unique_speakers)} unique speakers: {unique_speakers.tolist()}")
                 else:
                     self.log_message("⚠️ pyannote detected no speakers - all will be assigned to Speaker 0")
                 
-                # Combine and display results
-                self.log_message(f"🔍 Processing results: Google={len(google_results)}, pyannote={len(pyannote_results)}")
+                # Combine and display results - display runs on the Tk thread, which owns the widgets
+                self.log_message(f"🔍 Processing results: Google={len(google_results)}, pyannote={segment_count}")
                 
-                if google_results and pyannote_results:
+                if google_results and segment_count:
                     # Both Google and pyannote have results - combine them
                     self.log_message("✅ Both Google and pyannote have results - combining")
                     combined_results = self.combine_results(google_results, pyannote_results)
-                    self.display_results(combined_results)
-                elif google_results and not pyannote_results:
+                    self.root.after_idle(self.display_results, combined_results)
+                elif google_results and not segment_count:
                     # Only Google has results - display with default speaker
                     self.log_message("✅ Only Google has results - displaying with default speaker")
-                    self.display_google_only_results(google_results)
-                elif pyannote_results and not google_results:
+                    self.root.after_idle(self.display_google_only_results, google_results)
+                elif segment_count and not google_results:
                     # Only pyannote has results - show speaker timeline without transcription
                     self.log_message("✅ Only pyannote has results - displaying speaker activity")
-                    self.display_pyannote_only_live_results(pyannote_results)
+                    self.root.after_idle(self.display_pyannote_only_live_results, pyannote_results)
                 else:
                     # Neither has results
                     self.log_message("⚠️ Neither Google nor pyannote has results - nothing to display")
                 
-                # Clean up
-                os.unlink(temp_filename)
-                audio_buffer = []
-                
             except Exception as e:
                 self.log_message(f"❌ Processing error: {e}")
                 
-    def process_google(self, audio_file):
-        """Process with Google Speech-to-Text"""
-        try:
-            # Detect WAV file sample rate
-            sample_rate = self.RATE  # default
+            finally:
+                # Give the slot back to the capture thread
+                self._slot_ready[slot].clear()
+                self._slot_free[slot].set()
+                slot ^= 1
+                
+    def google_stream_worker(self):
+        """Stream microphone audio to Google STT and collect final results with absolute word times"""
+        config = self.get_recognition_config(self.RATE)  # Known from the recorder, no probing needed
+        streaming_config = speech.StreamingRecognitionConfig(config=config, interim_results=True)
+        sent_samples = 0
+        
+        while self.is_recording:
+            # Word offsets restart at zero on every stream
+            stream_base = sent_samples / self.RATE
+            stream_started = time.time()
+            
+            def request_generator():
+                nonlocal sent_samples
+                while self.is_recording and time.time() - stream_started < self.STREAM_RESTART_SECONDS:
+                    try:
+                        chunk = self.google_audio_queue.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    sent_samples += len(chunk) // 2  # 16-bit mono
+                    yield speech.StreamingRecognizeRequest(audio_content=chunk)
+                    
             try:
-                with wave.open(audio_file, 'rb') as wav_file:
-                    sample_rate = wav_file.getframerate()
-                    self.log_message(f"🔍 Detected sample rate: {sample_rate} Hz")
+                responses = self.speech_client.streaming_recognize(streaming_config, request_generator())
+                for response in responses:
+                    for result in response.results:
+                        if result.is_final and result.alternatives:
+                            self.add_stream_result(result, stream_base)
             except Exception as e:
-                self.log_message(f"⚠️ Could not detect sample rate, using default {self.RATE} Hz: {e}")
+                if self.is_recording:
+                    self.log_message(f"❌ Google streaming error: {e}")
+                    time.sleep(1)
+                    
+        with self._stream_cond:
+            self._stream_done = True
+            self._stream_cond.notify_all()
             
-            with open(audio_file, "rb") as f:
-                audio_content = f.read()
-                
-            audio = speech.RecognitionAudio(content=audio_content)
+    def add_stream_result(self, result, stream_base):
+        """Store one final streaming result for the processing thread and show it"""
+        alternative = result.alternatives[0]
+        words = [{
+            'word': word_info.word,
+            'start_time': stream_base + word_info.start_time.total_seconds(),
+            'end_time': stream_base + word_info.end_time.total_seconds()
+        } for word_info in alternative.words]
+        
+        with self._stream_cond:
+            self._stream_results.append({
+                'transcript': alternative.transcript,
+                'confidence': alternative.confidence,
+                'words': words
+            })
+            self._stream_heard_until = stream_base + result.result_end_time.total_seconds()
+            self._stream_cond.notify_all()
+            
+        # Update Google display
+        timestamp = time.strftime("%H:%M:%S")
+        self.append_text(self.google_text,
+            f"[{timestamp}] {alternative.transcript} (conf: {alternative.confidence:.2f})\n")
+        
+    def take_stream_results(self, window_start, window_end):
+        """Pop the streamed words that start before window_end, with window-relative word times"""
+        with self._stream_cond:
+            # Give Google a moment to finalise the end of this window
+            self._stream_cond.wait_for(
+                lambda: self._stream_heard_until >= window_end or self._stream_done,
+                timeout=self.STREAM_RESULT_WAIT
+            )
+            # Split each result by its own word times - later words wait for the next window
+            taken, pending = [], []
+            for result in self._stream_results:
+                words = result['words']
+                split = next((i for i, word_data in enumerate(words) if word_data['start_time'] >= window_end), len(words))
+                if split == len(words):
+                    taken.append(result)
+                    continue
+                if split:
+                    taken.append(dict(result, words=words[:split],
+                                      transcript=" ".join(word_data['word'] for word_data in words[:split])))
+                pending.append(dict(result, words=words[split:],
+                                    transcript=" ".join(word_data['word'] for word_data in words[split:])))
+            self._stream_results = pending
+            
+        # Words finalised after their own window was processed are clamped to this window's start
+        late_words = 0
+        window_results = []
+        for result in taken:
+            words = []
+            for word_data in result['words']:
+                late_words += word_data['start_time'] < window_start
+                words.append(dict(word_data,
+                                  start_time=max(word_data['start_time'] - window_start, 0.0),
+                                  end_time=max(word_data['end_time'] - window_start, 0.0)))
+            window_results.append(dict(result, words=words))
+            
+        if late_words:
+            self.log_message(f"⏱️ Google (streaming): {late_words} late words moved into the current window")
+        self.log_message(f"🗣️ Google (streaming): {len(window_results)} transcription results")
+        return window_results
+        
+    def get_recognition_config(self, sample_rate):
+        """Return the cached Google RecognitionConfig for the current language and this sample rate"""
+        key = (self._language, sample_rate)
+        config = self._config_cache.get(key)
+        if config is None:
             config = speech.RecognitionConfig(
                 encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=sample_rate,  # Use detected rate
-                language_code=self.language_var.get(),
+                sample_rate_hertz=sample_rate,
+                language_code=self._language,
                 enable_automatic_punctuation=True,
                 enable_word_time_offsets=True,
             )
+            self._config_cache[key] = config
+        return config
+        
+    def process_google(self, audio_source, sample_rate=None):
+        """Process with Google Speech-to-Text (WAV file path or raw LINEAR16 bytes at sample_rate)"""
+        try:
+            if isinstance(audio_source, (bytes, bytearray)):
+                # Raw PCM already in memory - sample rate is known
+                audio_content = bytes(audio_source)
+                sample_rate = sample_rate or self.RATE
+            else:
+                with open(audio_source, "rb") as f:
+                    audio_content = f.read()
+                    
+                # Detect WAV file sample rate straight from the canonical header (bytes 24-27)
+                if audio_content[:4] == b"RIFF" and audio_content[8:16] == b"WAVEfmt ":
+                    sample_rate = int.from_bytes(audio_content[24:28], "little")
+                    self.log_message(f"🔍 Detected sample rate: {sample_rate} Hz")
+                else:
+                    sample_rate = self.RATE  # default
+                    self.log_message(f"⚠️ Could not detect sample rate, using default {self.RATE} Hz")
+                
+            audio = speech.RecognitionAudio(content=audio_content)
+            config = self.get_recognition_config(sample_rate)  # Use detected rate
             
             response = self.speech_client.recognize(config=config, audio=audio)
             
             results = []
+            lines = []
+            timestamp = time.strftime("%H:%M:%S")
             for result in response.results:
                 alternative = result.alternatives[0]
                 
@@ -736,12 +1258,10 @@ class AuthenticatedHybridDiarization:
                     'words': words
                 })
                 
-                # Update Google display
-                timestamp = time.strftime("%H:%M:%S")
-                self.google_text.insert(tk.END, 
-                    f"[{timestamp}] {alternative.transcript} (conf: {alternative.confidence:.2f})\n")
-                self.google_text.see(tk.END)
+                lines.append(f"[{timestamp}] {alternative.transcript} (conf: {alternative.confidence:.2f})\n")
                 
+            # Update Google display
+            self.append_text(self.google_text, "".join(lines))
             self.log_message(f"🗣️ Google: {len(results)} transcription results")
             return results
             
@@ -749,43 +1269,66 @@ class AuthenticatedHybridDiarization:
             self.log_message(f"❌ Google processing error: {e}")
             return []
             
-    def process_pyannote(self, audio_file):
-        """Process with pyannote speaker diarization"""
+    def process_pyannote(self, audio_source, sample_rate=None, out=None):
+        """Process with pyannote speaker diarization (file path or int16 PCM array at sample_rate)
+        
+        out is an optional float32 scratch buffer for PCM input; the waveform tensor aliases it.
+        """
         try:
-            diarization = self.diarization_pipeline(audio_file)
+            if isinstance(audio_source, np.ndarray):
+                # In-memory PCM - hand pyannote a waveform tensor instead of a file to decode
+                n = len(audio_source)
+                out = out[:n] if out is not None and n <= len(out) else np.empty(n, dtype=np.float32)
+                np.multiply(audio_source, np.float32(1.0 / 32768.0), out=out)
+                waveform = torch.from_numpy(out).unsqueeze(0)
+                audio_source = {"waveform": waveform, "sample_rate": sample_rate or self.RATE}
+                
+            # Embeddings come back in diarization.labels() order, one row per local speaker
+            diarization, embeddings = self.run_diarization(audio_source, return_embeddings=True)
+            speaker_embeddings = {}
+            if embeddings is not None:
+                speaker_embeddings = dict(zip(diarization.labels(), np.asarray(embeddings, dtype=np.float32)))
             
-            results = []
             local_speaker_mapping = {}  # For this segment only
+            global_speaker_ids = {}  # Local label -> global ID, resolved once per label
             
-            # First pass: create local mapping for this segment
+            # First pass: create local mapping for this segment and match each voice once.
+            # pyannote already told these labels apart, so each global ID is given to at most one of them
             for turn, _, speaker in diarization.itertracks(yield_label=True):
                 if speaker not in local_speaker_mapping:
                     local_speaker_mapping[speaker] = len(local_speaker_mapping)
+                    global_speaker_ids[speaker] = self.get_global_speaker_id(
+                        speaker, speaker_embeddings.get(speaker), claimed=set(global_speaker_ids.values()))
             
             # Second pass: map to global consistent speaker IDs
-            global_results = []
+            starts, ends, speaker_ids = [], [], []
+            lines = []
+            timestamp = time.strftime("%H:%M:%S")
             for turn, _, speaker in diarization.itertracks(yield_label=True):
                 start_time = turn.start
                 end_time = turn.end
                 local_id = local_speaker_mapping[speaker]
                 
                 # Map to global consistent speaker ID
-                global_speaker_id = self.get_global_speaker_id(speaker, start_time, end_time, audio_file)
+                global_speaker_id = global_speaker_ids[speaker]
                 
-                results.append((start_time, end_time, local_id))
-                global_results.append((start_time, end_time, global_speaker_id))
+                starts.append(start_time)
+                ends.append(end_time)
+                speaker_ids.append(global_speaker_id)
                 
-                # Update pyannote display with both local and global IDs
-                timestamp = time.strftime("%H:%M:%S")
-                self.pyannote_text.insert(tk.END, 
+                lines.append(
                     f"[{timestamp}] Local Speaker {local_id} → Global Speaker {global_speaker_id} ({start_time:.1f}s-{end_time:.1f}s) [pyannote: {speaker}]\n")
-                self.pyannote_text.see(tk.END)
             
-            # Use global results for speaker assignment
-            results = global_results
-            unique_speakers = set(speaker_id for _, _, speaker_id in results)
+            # Update pyannote display with both local and global IDs
+            self.append_text(self.pyannote_text, "".join(lines))
+            
+            # Use global results for speaker assignment, stored as parallel arrays
+            results = (np.array(starts, dtype=np.float32),
+                       np.array(ends, dtype=np.float32),
+                       np.array(speaker_ids, dtype=np.int16))
+            unique_speakers = set(global_speaker_ids.values())  # One entry per label, not per segment
             
-            self.log_message(f"👤 pyannote: {len(results)} speaker segments found")
+            self.log_message(f"👤 pyannote: {len(speaker_ids)} speaker segments found")
             self.log_message(f"🔍 Local speakers in this segment: {len(local_speaker_mapping)} → Global speakers: {len(unique_speakers)}")
             if local_speaker_mapping:
                 self.log_message(f"🔍 Segment mapping: {local_speaker_mapping}")
@@ -794,75 +1337,109 @@ class AuthenticatedHybridDiarization:
             
         except Exception as e:
             self.log_message(f"❌ pyannote processing error: {e}")
-            return []
+            return empty_speaker_segments()
     
-    def get_global_speaker_id(self, pyannote_speaker, start_time, end_time, audio_file):
-        """Map pyannote speaker to global consistent speaker ID"""
-        
-        # If we've seen this exact pyannote speaker label before, use the same global ID
-        if pyannote_speaker in self.global_speaker_mapping:
-            return self.global_speaker_mapping[pyannote_speaker]
-        
-        # For new speakers, try to match with existing speakers based on timing and voice characteristics
-        # For now, assign new global ID (can be enhanced with voice similarity matching)
+    def get_global_speaker_id(self, pyannote_speaker, embedding=None, claimed=()):
+        """Map pyannote speaker to global consistent speaker ID, by voice embedding when available
+        
+        claimed holds global IDs already taken by other speakers in the same window.
+        """
+        with self._centroid_lock:
+            if embedding is not None and np.all(np.isfinite(embedding)):
+                return self.match_speaker_embedding(pyannote_speaker, embedding, claimed)
+            
+            # No usable embedding - fall back to the pyannote label.
+            # If we've seen this exact pyannote speaker label before, use the same global ID;
+            # otherwise the label takes the next free ID in the same lookup
+            global_id = self.global_speaker_mapping.setdefault(pyannote_speaker, self.next_global_speaker_id)
+            if global_id != self.next_global_speaker_id:
+                return global_id
+            
+            # For new speakers, try to match with existing speakers based on timing and voice characteristics
+            # For now, assign new global ID (can be enhanced with voice similarity matching)
+            self.next_global_speaker_id += 1
+            
+            self.log_message(f"🆕 New global speaker {global_id} assigned to pyannote {pyannote_speaker}")
+            
+            return global_id
+        
+    def match_speaker_embedding(self, pyannote_speaker, embedding, claimed=()):
+        """Match an embedding to the closest unclaimed speaker centroid by cosine similarity, or add a new speaker
+        
+        Caller must hold _centroid_lock.
+        """
+        unit = (embedding / (np.linalg.norm(embedding) + 1e-9)).astype(np.float32)
+        best_similarity = -1.0
+        if self._centroids_q is not None:
+            # Rows are unit length, so one integer matrix-vector product (rescaled) gives every cosine similarity
+            unit_q, unit_scale = quantize_int8(unit)
+            dots = self._centroids_q.astype(np.int32) @ unit_q.astype(np.int32)
+            similarities = dots * (self._centroid_scales[:, 0] * unit_scale[0])
+            if claimed:
+                # Rows held by another voice in this window are off limits, so two speakers never merge
+                similarities[np.isin(self._centroid_ids, list(claimed))] = -np.inf
+            row = int(similarities.argmax())
+            best_similarity = float(similarities[row])
+            
+        if best_similarity > self.SPEAKER_MATCH_THRESHOLD:
+            # Same voice - fold this segment into the running mean, renormalise and requantize the row
+            count = self._centroid_counts[row]
+            centroid = self._centroids_q[row] * self._centroid_scales[row] * count + unit
+            centroid /= np.linalg.norm(centroid) + 1e-9
+            self._centroids_q[row], self._centroid_scales[row] = quantize_int8(centroid)
+            self._centroid_counts[row] = count + 1
+            return self._centroid_ids[row]
+            
         global_id = self.next_global_speaker_id
-        self.global_speaker_mapping[pyannote_speaker] = global_id
         self.next_global_speaker_id += 1
+        unit_q, unit_scale = quantize_int8(unit[None, :])
+        if self._centroids_q is None:
+            self._centroids_q, self._centroid_scales = unit_q, unit_scale
+        else:
+            self._centroids_q = np.vstack((self._centroids_q, unit_q))
+            self._centroid_scales = np.vstack((self._centroid_scales, unit_scale))
+        self._centroid_ids.append(global_id)
+        self._centroid_counts.append(1)
         
-        self.log_message(f"🆕 New global speaker {global_id} assigned to pyannote {pyannote_speaker}")
+        self.log_message(f"🆕 New global speaker {global_id} assigned to pyannote {pyannote_speaker} "
+                         f"(best match {best_similarity:.2f})")
         
         return global_id
             
     def combine_results(self, google_results, pyannote_results):
         """Combine Google transcripts with pyannote speaker labels"""
-        combined = []
+        words = [(word_data, google_result['confidence'])
+                 for google_result in google_results for word_data in google_result['words']]
+        if not words:
+            return []
+            
+        word_starts = np.array([word_data['start_time'] for word_data, _ in words], dtype=np.float64)
+        word_ends = np.array([word_data['end_time'] for word_data, _ in words], dtype=np.float64)
+        
+        starts, ends, speaker_ids = pyannote_results
+        if NUMBA_AVAILABLE:
+            # Sort, sweep and scatter back in a single compiled call
+            speakers = assign_speakers_unsorted(
+                word_starts, word_ends,
+                starts.astype(np.float64), ends.astype(np.float64), speaker_ids.astype(np.int32)
+            )
+        else:
+            # The broadcast fallback matches the sweep's tie-breaks on start-time order
+            seg_order = np.argsort(starts, kind="stable")
+            word_order = np.argsort(word_starts, kind="stable")
+            speakers = np.empty(len(words), dtype=np.int32)
+            speakers[word_order] = assign_speakers_vectorized(
+                word_starts[word_order], word_ends[word_order],
+                starts[seg_order], ends[seg_order], speaker_ids[seg_order].astype(np.int32)
+            )
         
-        for google_result in google_results:
-            for word_data in google_result['words']:
-                word_start = word_data['start_time']
-                word_end = word_data['end_time']
-                word_mid = (word_start + word_end) / 2
-                
-                # Find best matching speaker segment
-                best_speaker = 0  # default to Speaker 0
-                best_overlap = 0
-                
-                for segment_start, segment_end, speaker_id in pyannote_results:
-                    # Calculate overlap
-                    overlap_start = max(word_start, segment_start)
-                    overlap_end = min(word_end, segment_end)
-                    
-                    if overlap_end > overlap_start:
-                        overlap = overlap_end - overlap_start
-                        if overlap > best_overlap:
-                            best_overlap = overlap
-                            best_speaker = speaker_id
-                
-                # If no speaker overlap found, use temporal proximity
-                if best_overlap == 0 and pyannote_results:
-                    closest_distance = float('inf')
-                    for segment_start, segment_end, speaker_id in pyannote_results:
-                        # Distance from word to segment
-                        if word_mid < segment_start:
-                            distance = segment_start - word_mid
-                        elif word_mid > segment_end:
-                            distance = word_mid - segment_end
-                        else:
-                            distance = 0  # word is within segment
-                            
-                        if distance < closest_distance:
-                            closest_distance = distance
-                            best_speaker = speaker_id
-                
-                combined.append({
-                    'word': word_data['word'],
-                    'start_time': word_start,
-                    'end_time': word_end,
-                    'speaker': best_speaker,
-                    'confidence': google_result['confidence']
-                })
-                
-        return combined
+        return [{
+            'word': word_data['word'],
+            'start_time': word_data['start_time'],
+            'end_time': word_data['end_time'],
+            'speaker': speaker_id,
+            'confidence': confidence
+        } for (word_data, confidence), speaker_id in zip(words, speakers.tolist())]
         
     def display_results(self, combined_results):
         """Display combined results"""
@@ -872,74 +1449,79 @@ class AuthenticatedHybridDiarization:
         # Group by speaker for conversation view
         conversations = []
         current_speaker = None
-        current_text = ""
+        current_words = []
         current_start = None
         
         for word_data in combined_results:
             if current_speaker != word_data['speaker']:
-                if current_text.strip():
+                text = " ".join(current_words).strip()
+                if text:
                     conversations.append({
                         'speaker': current_speaker,
-                        'text': current_text.strip(),
+                        'text': text,
                         'start_time': current_start
                     })
                 current_speaker = word_data['speaker']
-                current_text = ""
+                current_words = []
                 current_start = word_data['start_time']
                 
-            current_text += word_data['word'] + " "
+            current_words.append(word_data['word'])
             
         # Add last conversation
-        if current_text.strip():
+        text = " ".join(current_words).strip()
+        if text:
             conversations.append({
                 'speaker': current_speaker,
-                'text': current_text.strip(),
+                'text': text,
                 'start_time': current_start
             })
             
-        # Display conversations with color coding
-        speaker_colors = {0: "#e74c3c", 1: "#3498db", 2: "#2ecc71", 3: "#f39c12", 4: "#9b59b6", 5: "#1abc9c"}
-        
+        # Display conversations with color coding (tags are configured once in setup_gui),
+        # tracking each tag's character ranges from one base index instead of end-2l lookups
+        base_index = self.transcript_text.index("end-1c")
+        lines = []
+        tag_ranges = {}
+        offset = 0
+        timestamp = time.strftime("%H:%M:%S")
         for conv in conversations:
             speaker_id = conv['speaker']
-            color = speaker_colors.get(speaker_id, "#333333")
+            tag = self.SPEAKER_TAGS[speaker_id if 0 <= speaker_id < len(self.SPEAKER_COLORS) else -1]
             
             # Update speaker statistics
-            words = len(conv['text'].split())
-            if speaker_id not in self.speaker_stats:
-                self.speaker_stats[speaker_id] = 0
-            self.speaker_stats[speaker_id] += words
+            self.add_speaker_words(speaker_id, len(conv['text'].split()))
             
-            timestamp = time.strftime("%H:%M:%S")
-            self.transcript_text.insert(tk.END, 
-                f"[{timestamp}] Speaker {speaker_id}: {conv['text']}\n")
-            
-            # Apply color to speaker text
-            start_index = self.transcript_text.index("end-2l")
-            end_index = self.transcript_text.index("end-1l")
-            self.transcript_text.tag_add(f"speaker_{speaker_id}", start_index, end_index)
-            self.transcript_text.tag_config(f"speaker_{speaker_id}", foreground=color)
+            text = f"[{timestamp}] Speaker {speaker_id}: {conv['text']}\n"
+            tag_ranges.setdefault(tag, []).extend((f"{base_index}+{offset}c", f"{base_index}+{offset + len(text)}c"))
+            lines.append(text)
+            offset += len(text)
             
+        # Insert once, then apply color to speaker text with one tag_add per speaker
+        self.transcript_text.insert(tk.END, "".join(lines))
+        for tag, ranges in tag_ranges.items():
+            self.transcript_text.tag_add(tag, *ranges)
         self.transcript_text.see(tk.END)
         
         # Update speaker statistics
-        total_words = sum(self.speaker_stats.values())
-        stats_text = "👥 Speaker Statistics: "
-        for speaker_id, word_count in self.speaker_stats.items():
-            percentage = (word_count / total_words * 100) if total_words > 0 else 0
-            stats_text += f"Speaker {speaker_id}: {word_count} words ({percentage:.1f}%) | "
-        
-        self.stats_label.config(text=stats_text.rstrip(" | "))
+        self.update_speaker_stats()
         
     def clear_all(self):
         """Clear all displays"""
         self.transcript_text.delete(1.0, tk.END)
         self.google_text.delete(1.0, tk.END)
         self.pyannote_text.delete(1.0, tk.END)
-        self.speaker_stats.clear()
+        self.reset_speaker_stats()
         self.stats_label.config(text="👥 Speaker Statistics: Waiting for speech...")
         self.log_message("🗑️ All displays cleared")
         
+    def on_close(self):
+        """Stop recording and release PortAudio when the window closes"""
+        if self.is_recording:
+            self.stop_recording()
+        if self.pyaudio_instance is not None:
+            self.pyaudio_instance.terminate()
+        self._executor.shutdown(wait=False)
+        self.root.destroy()
+        
     def run(self):
         """Start the application"""
         self.log_message("🚀 Authenticated Hybrid Speech + Speaker Diarization Started")
@@ -963,16 +1545,11 @@ def main():
         print("❌ Google Cloud credentials not found")
         
     # Check Hugging Face authentication
-    try:
-        from huggingface_hub import HfFolder
-        token = HfFolder.get_token()
-        if token:
-            print("✅ Hugging Face authentication found")
-        else:
-            print("❌ Hugging Face not authenticated")
-            print("💡 Run: huggingface-cli login")
-    except:
-        print("❌ Hugging Face authentication check failed")
+    if HF_TOKEN:
+        print("✅ Hugging Face authentication found")
+    else:
+        print("❌ Hugging Face not authenticated")
+        print("💡 Run: huggingface-cli login")
         
     # Check pyannote availability
     if PYANNOTE_AVAILABLE:
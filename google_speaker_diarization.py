@@ -17,13 +17,26 @@ import pyaudio
 import threading
 import time
 import queue
+import itertools
+from operator import itemgetter
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from google.cloud import speech_v1p1beta1 as speech
 from google.oauth2 import service_account
-from collections import defaultdict
+from dataclasses import dataclass
+
+@dataclass
+class TranscriptEvent:
+    """One streaming result, parsed off the gRPC thread for the Tk thread to display"""
+    is_final: bool
+    transcript: str
+    words: tuple  # ((word, speaker_tag), ...) for final results
 
 class GoogleStyleSpeakerDiarization:
+    # Rolling line limits so long sessions don't slow the Text widgets down
+    MAX_LOG_LINES = 5000
+    MAX_TRANSCRIPT_LINES = 20000
+    
     def __init__(self):
         # Audio recording parameters (from example)
         self.RATE = 16000
@@ -33,10 +46,17 @@ class GoogleStyleSpeakerDiarization:
         
         # Threading and control
         self.is_recording = False
-        self.audio_queue = queue.Queue()
+        # Captured PCM waiting to be streamed: one growing bytearray, swapped out whole by the request generator
+        self._audio_buffer = bytearray()
+        self._audio_lock = threading.Lock()
+        self._audio_ready = threading.Event()
+        self.max_buffered_bytes = 50 * self.CHUNK * 2  # ~5 s of 16-bit audio; oldest dropped beyond this
+        self._dropped_bytes = 0
+        self._last_drop_warning = 0.0
         self.pyaudio_instance = None
         self.stream = None
         self.transcription_thread = None
+        self.debug = False  # Log every word with its speaker tag (one line per final result)
         
         # Speaker tracking and colors
         self.speaker_colors = {
@@ -47,11 +67,16 @@ class GoogleStyleSpeakerDiarization:
             5: "#FFEAA7",  # Yellow
             6: "#DDA0DD",  # Plum
         }
-        self.speaker_stats = defaultdict(int)  # Track word count per speaker
+        self.speaker_stats = {}  # Track word count per speaker - only touched on the Tk thread
+        self._last_stats_text = None  # Last text set on stats_label
         
         # Google Cloud Speech client
         self.speech_client = None
         
+        # Pending GUI work from any thread, applied on the Tk thread every 50 ms
+        self._gui_queue = queue.Queue()
+        self._timestamp_cache = (None, "")  # (epoch second, "%H:%M:%S"), swapped as one tuple
+        
         # GUI setup (must be first for logging)
         self.setup_gui()
         
@@ -192,6 +217,16 @@ class GoogleStyleSpeakerDiarization:
         )
         self.transcript_text.pack(fill=tk.BOTH, expand=True, pady=10)
         
+        # Speaker color tags are fixed, so configure them once here
+        for speaker_tag, color in self.speaker_colors.items():
+            self.transcript_text.tag_config(f"speaker_{speaker_tag}", foreground=color, font=("Arial", 11, "bold"))
+        self.transcript_text.tag_config("speaker_unknown", foreground="#333333", font=("Arial", 11, "bold"))
+        self.transcript_text.tag_config("interim", foreground="#888888", font=("Arial", 10, "italic"))
+        
+        # The current interim hypothesis lives between this mark and the end, replaced in place
+        self.transcript_text.mark_set("interim_start", "end-1c")
+        self.transcript_text.mark_gravity("interim_start", tk.LEFT)
+        
         # Log display
         log_label = tk.Label(
             self.root,
@@ -212,65 +247,87 @@ class GoogleStyleSpeakerDiarization:
         )
         self.log_text.pack(fill=tk.X, padx=20, pady=(0, 20))
         
+        self.root.after(50, self._drain_gui_queue)
+        
+    def timestamp(self):
+        """Current "%H:%M:%S" time, formatted at most once per second"""
+        now = time.time()
+        second, text = self._timestamp_cache
+        if second != int(now):
+            text = time.strftime("%H:%M:%S", time.localtime(now))
+            self._timestamp_cache = (int(now), text)
+        return text
+        
     def log_message(self, message):
-        """Add message to log display"""
-        timestamp = time.strftime("%H:%M:%S")
+        """Queue message for the log display (safe from any thread)"""
+        timestamp = self.timestamp()
         log_entry = f"[{timestamp}] {message}\n"
         
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self._gui_queue.put(("log", log_entry))
         
-    def add_transcription_with_speakers(self, transcript, words_info=None, is_final=False):
-        """Add transcription to display with speaker information (following Google's example)"""
-        timestamp = time.strftime("%H:%M:%S")
+    def _drain_gui_queue(self, max_items=200):
+        """Apply queued log lines and transcript updates in one batch, then reschedule"""
+        log_lines = []
+        transcript_changed = False
+        for _ in range(max_items):
+            try:
+                kind, payload = self._gui_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                log_lines.append(payload)
+            elif kind == "transcript":
+                self.add_transcription_with_speakers(payload)
+                transcript_changed = True
+            elif kind == "stop":
+                self.stop_recording()
+                
+        if log_lines:
+            self.log_text.insert(tk.END, "".join(log_lines))
+            self.trim_text(self.log_text, self.MAX_LOG_LINES)
+            self.log_text.see(tk.END)
+        if transcript_changed:
+            self.trim_text(self.transcript_text, self.MAX_TRANSCRIPT_LINES)
+            self.transcript_text.see(tk.END)
+            
+        self.root.after(50, self._drain_gui_queue)
+        
+    def trim_text(self, widget, max_lines):
+        """Delete the oldest lines so the widget keeps at most max_lines"""
+        lines = int(widget.index("end-1c").split(".")[0])
+        if lines > max_lines:
+            widget.delete("1.0", f"{lines - max_lines + 1}.0")
+            
+    def add_transcription_with_speakers(self, event):
+        """Add a TranscriptEvent to the display with speaker information (Tk thread only)"""
+        timestamp = self.timestamp()
+        transcript = event.transcript
+        words_info = event.words
+        is_final = event.is_final
+        
+        # Drop the previous interim hypothesis - it is superseded by whatever comes next
+        self.transcript_text.delete("interim_start", "end-1c")
         
         if words_info and is_final:
             # Process speaker information for final results (as in Google's example)
             self.log_message(f"👥 Processing {len(words_info)} words with speaker tags")
+            if self.debug:
+                self.log_message("  Words: " + " ".join(f"'{word}'->{tag}" for word, tag in words_info))
             
-            formatted_text = f"[{timestamp}] "
-            current_speaker = None
-            current_text = ""
-            
-            for word_info in words_info:
-                speaker_tag = word_info.speaker_tag
-                word = word_info.word
-                
-                self.log_message(f"  Word: '{word}' -> Speaker {speaker_tag}")
+            # Group consecutive words by speaker into (text, tag) pairs for a single insert
+            runs = []
+            for speaker_tag, group in itertools.groupby(words_info, key=itemgetter(1)):
+                words = [word for word, _ in group]
                 
                 # Update speaker statistics
-                self.speaker_stats[speaker_tag] += 1
+                self.speaker_stats[speaker_tag] = self.speaker_stats.get(speaker_tag, 0) + len(words)
                 
-                if current_speaker != speaker_tag:
-                    # Speaker changed, add previous speaker's text
-                    if current_text:
-                        color = self.speaker_colors.get(current_speaker, "#333333")
-                        self.transcript_text.insert(tk.END, current_text)
-                        # Apply color to the just-inserted text
-                        start_index = self.transcript_text.index(f"end-{len(current_text)}c")
-                        end_index = self.transcript_text.index("end-1c")
-                        self.transcript_text.tag_add(f"speaker_{current_speaker}", start_index, end_index)
-                        self.transcript_text.tag_config(f"speaker_{current_speaker}", 
-                                                      foreground=color, font=("Arial", 11, "bold"))
-                    
-                    # Start new speaker text
-                    current_speaker = speaker_tag
-                    current_text = f"[Speaker {speaker_tag}] {word} "
-                else:
-                    current_text += f"{word} "
+                tag = f"speaker_{speaker_tag}" if speaker_tag in self.speaker_colors else "speaker_unknown"
+                runs += (f"[Speaker {speaker_tag}] {' '.join(words)} ", tag)
             
-            # Add remaining text
-            if current_text:
-                color = self.speaker_colors.get(current_speaker, "#333333")
-                self.transcript_text.insert(tk.END, current_text)
-                start_index = self.transcript_text.index(f"end-{len(current_text)}c")
-                end_index = self.transcript_text.index("end-1c")
-                self.transcript_text.tag_add(f"speaker_{current_speaker}", start_index, end_index)
-                self.transcript_text.tag_config(f"speaker_{current_speaker}", 
-                                              foreground=color, font=("Arial", 11, "bold"))
-            
-            self.transcript_text.insert(tk.END, "\n\n")
+            # Tk applies each run's tag as the text goes in
+            self.transcript_text.insert(tk.END, *runs, "\n\n", ())
+            self.transcript_text.mark_set("interim_start", "end-1c")
             
             # Update speaker statistics display
             self.update_speaker_stats()
@@ -279,31 +336,28 @@ class GoogleStyleSpeakerDiarization:
             # Final results without speaker info
             text = f"[{timestamp}] {transcript}\n\n"
             self.transcript_text.insert(tk.END, text)
+            self.transcript_text.mark_set("interim_start", "end-1c")
         else:
-            # Interim results (as in Google's example)
-            interim_text = f"[Interim] {transcript}\n"
-            self.transcript_text.insert(tk.END, interim_text)
-            self.transcript_text.tag_add("interim", "end-2l", "end-1l")
-            self.transcript_text.tag_config("interim", foreground="#888888", font=("Arial", 10, "italic"))
-        
-        self.transcript_text.see(tk.END)
-        self.root.update_idletasks()
+            # Interim results (as in Google's example), tagged on insert after the mark
+            self.transcript_text.insert(tk.END, f"[Interim] {transcript}\n", "interim")
         
     def update_speaker_stats(self):
         """Update the speaker statistics display"""
         if not self.speaker_stats:
-            self.stats_label.config(text="👥 Speaker Statistics: Waiting for speech...")
-            return
-            
-        total_words = sum(self.speaker_stats.values())
-        stats_text = "👥 Speaker Statistics: "
-        
-        for speaker, word_count in sorted(self.speaker_stats.items()):
-            percentage = (word_count / total_words) * 100
-            stats_text += f"Speaker {speaker}: {word_count} words ({percentage:.1f}%) | "
+            stats_text = "👥 Speaker Statistics: Waiting for speech..."
+        else:
+            total_words = sum(self.speaker_stats.values())
+            parts = []
+            for speaker, word_count in sorted(self.speaker_stats.items()):
+                # Percentage in tenths, rounded half up, formatted without going through float
+                tenths = (word_count * 1000 + total_words // 2) // total_words
+                parts.append(f"Speaker {speaker}: {word_count} words ({tenths // 10}.{tenths % 10}%)")
+            stats_text = "👥 Speaker Statistics: " + " | ".join(parts)
             
-        stats_text = stats_text.rstrip(" | ")
-        self.stats_label.config(text=stats_text)
+        # Only touch the label (and trigger a relayout) when the text actually changes
+        if stats_text != self._last_stats_text:
+            self._last_stats_text = stats_text
+            self.stats_label.config(text=stats_text)
         
     def clear_transcription(self):
         """Clear the transcription display"""
@@ -323,6 +377,9 @@ class GoogleStyleSpeakerDiarization:
         """Start recording and transcription"""
         try:
             self.is_recording = True
+            with self._audio_lock:
+                self._audio_buffer.clear()
+            self._audio_ready.clear()
             self.toggle_button.config(text="🛑 Stop Recording", bg="#f44336")
             
             # Initialize PyAudio
@@ -332,21 +389,20 @@ class GoogleStyleSpeakerDiarization:
                 channels=self.CHANNELS,
                 rate=self.RATE,
                 input=True,
-                frames_per_buffer=self.CHUNK
+                frames_per_buffer=self.CHUNK,
+                stream_callback=self.audio_callback  # PortAudio's thread appends chunks to _audio_buffer
             )
             
             self.log_message("🎙️ Microphone recording started")
             
-            # Start transcription thread (following Google's pattern)
-            self.transcription_thread = threading.Thread(target=self.main_streaming_loop)
+            # Start transcription thread (following Google's pattern), with the settings read here on the Tk thread
+            self.transcription_thread = threading.Thread(
+                target=self.main_streaming_loop,
+                args=(self.language_var.get(), int(self.min_speakers_var.get()), int(self.max_speakers_var.get()))
+            )
             self.transcription_thread.daemon = True
             self.transcription_thread.start()
             
-            # Start audio capture thread
-            audio_thread = threading.Thread(target=self.audio_capture_worker)
-            audio_thread.daemon = True
-            audio_thread.start()
-            
         except Exception as e:
             self.log_message(f"❌ Error starting recording: {str(e)}")
             self.stop_recording()
@@ -354,6 +410,7 @@ class GoogleStyleSpeakerDiarization:
     def stop_recording(self):
         """Stop recording and transcription"""
         self.is_recording = False
+        self._audio_ready.set()  # Wake the request generator now so the stream closes without waiting out its timeout
         self.toggle_button.config(text="🎙️ Start Recording", bg="#4CAF50")
         
         try:
@@ -371,40 +428,50 @@ class GoogleStyleSpeakerDiarization:
         except Exception as e:
             self.log_message(f"❌ Error stopping recording: {str(e)}")
             
-    def audio_capture_worker(self):
-        """Worker thread to capture audio from microphone"""
-        self.log_message("🎵 Audio capture thread started")
-        
-        while self.is_recording:
-            try:
-                if self.stream:
-                    data = self.stream.read(self.CHUNK, exception_on_overflow=False)
-                    self.audio_queue.put(data)
-            except Exception as e:
-                if self.is_recording:
-                    self.log_message(f"❌ Audio capture error: {str(e)}")
-                break
+    def audio_callback(self, in_data, frame_count, time_info, status):
+        """PyAudio callback - queue each captured chunk for streaming"""
+        if self.is_recording:
+            self.enqueue_audio(in_data)
+        return (None, pyaudio.paContinue)
+        
+    def enqueue_audio(self, data):
+        """Append a chunk to the audio buffer, dropping the oldest audio if the stream has fallen behind"""
+        with self._audio_lock:
+            self._audio_buffer.extend(data)
+            overflow = len(self._audio_buffer) - self.max_buffered_bytes
+            if overflow > 0:
+                del self._audio_buffer[:overflow]  # Chunks are whole samples, so this stays aligned
+        self._audio_ready.set()
+        
+        if overflow > 0:
+            # Warn at most every 5 seconds
+            self._dropped_bytes += overflow
+            now = time.time()
+            if now - self._last_drop_warning >= 5:
+                dropped_ms = self._dropped_bytes * 1000 // (self.RATE * 2)
+                self.log_message(f"⚠️ Streaming is behind - dropped {dropped_ms} ms of old audio")
+                self._last_drop_warning = now
+                self._dropped_bytes = 0
                 
-        self.log_message("🎵 Audio capture thread stopped")
-        
     def microphone_stream(self):
-        """Generates a stream of audio data from the microphone (Google's pattern)"""
+        """Generates streaming requests with the microphone audio (Google's pattern)"""
+        request = speech.StreamingRecognizeRequest
         while self.is_recording:
-            try:
-                chunk = self.audio_queue.get(timeout=0.5)
-                yield chunk
-            except queue.Empty:
+            if not self._audio_ready.wait(timeout=0.5):
                 continue
                 
-    def main_streaming_loop(self):
+            # Take everything captured so far as one request - any backlog included
+            with self._audio_lock:
+                data = bytes(self._audio_buffer)
+                self._audio_buffer.clear()
+                self._audio_ready.clear()
+            if data:
+                yield request(audio_content=data)
+                
+    def main_streaming_loop(self, current_language, min_speakers, max_speakers):
         """Main streaming recognition loop (following Google's example exactly)"""
         self.log_message("🚀 Starting streaming recognition with speaker diarization...")
         
-        # Get configuration
-        current_language = self.language_var.get()
-        min_speakers = int(self.min_speakers_var.get())
-        max_speakers = int(self.max_speakers_var.get())
-        
         self.log_message(f"🌐 Language: {current_language}")
         self.log_message(f"👥 Expected speakers: {min_speakers}-{max_speakers}")
         
@@ -429,10 +496,8 @@ class GoogleStyleSpeakerDiarization:
             interim_results=True
         )
         
-        # Create audio generator and requests (from example)
-        audio_generator = self.microphone_stream()
-        requests = (speech.StreamingRecognizeRequest(audio_content=content)
-                  for content in audio_generator)
+        # Create the request generator (from example) - it wraps each audio batch itself
+        requests = self.microphone_stream()
         
         try:
             # Perform streaming recognition (from example)
@@ -440,39 +505,47 @@ class GoogleStyleSpeakerDiarization:
             
             self.log_message("✅ Streaming recognition connected, listening...")
             
+            # Bind hot-loop lookups once
+            log = self.log_message
+            push = self._gui_queue.put_nowait
+            debug = self.debug
+            
             # Process responses (following guide pattern)
             for response in responses:
                 if not self.is_recording:
                     break
                     
-                if not response.results:
+                results = response.results
+                if not results:
                     continue
                     
-                result = response.results[0]
-                if not result.alternatives:
+                result = results[0]
+                alternatives = result.alternatives
+                if not alternatives:
                     continue
                     
-                transcript = result.alternatives[0].transcript
+                alternative = alternatives[0]
+                transcript = alternative.transcript
                 
                 if result.is_final:
-                    self.log_message(f"✅ Final transcript: {transcript}")
+                    # The final result with speaker tags (following Google's documentation),
+                    # copied out of the protobuf so the Tk thread only sees plain tuples
+                    words = tuple((w.word, w.speaker_tag) for w in alternative.words)
+                    if debug:
+                        log(f"✅ Final transcript: {transcript}")
+                        if words:
+                            log(f"👥 Got {len(words)} words with speaker information")
+                            log("  Words: " + " ".join(f"{word}/{tag}" for word, tag in words))
                     
-                    # The final result with speaker tags (following Google's documentation)
-                    words_info = result.alternatives[0].words
-                    if words_info:
-                        self.log_message(f"👥 Got {len(words_info)} words with speaker information")
-                        for word_info in words_info:
-                            self.log_message(f"  Word: {word_info.word}, Speaker Tag: {word_info.speaker_tag}")
-                    
-                    self.add_transcription_with_speakers(transcript, words_info, is_final=True)
+                    push(("transcript", TranscriptEvent(True, transcript, words)))
                 else:
                     # Interim results (following Google's documentation)
-                    self.add_transcription_with_speakers(transcript, is_final=False)
+                    push(("transcript", TranscriptEvent(False, transcript, ())))
                     
         except Exception as e:
             if self.is_recording:
                 self.log_message(f"❌ Streaming error: {str(e)}")
-                self.stop_recording()
+                self._gui_queue.put(("stop", None))
                 
     def run(self):
         """Start the application"""
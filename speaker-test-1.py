@@ -9,18 +9,16 @@ import sys
 import threading
 import time
 import queue
-import wave
-import tempfile
 import pyaudio
+import numpy as np
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from google.cloud import speech
 from google.oauth2 import service_account
 from collections import deque
-import requests                     # For Beta API calls
-import json
-import base64
-from google.auth.transport.requests import Request
+
+# Final characters that end a sentence in the speaker conversation view
+_SENT_END = frozenset('.!?')
 
 class MicrophoneStreamingWithSpeakers:
     def __init__(self):
@@ -29,21 +27,41 @@ class MicrophoneStreamingWithSpeakers:
         self.CHUNK = 1024
         self.CHANNELS = 1
         self.FORMAT = pyaudio.paInt16
+        self.SAMPLE_WIDTH = pyaudio.get_sample_size(self.FORMAT)  # Bytes per sample, fixed by FORMAT
+        self.MAX_BUFFER_SECONDS = 30  # Audio kept for speaker diarization (keep under recognize()'s 1 minute limit)
+        self.BATCH_BYTES = 4 * self.CHUNK * self.SAMPLE_WIDTH  # Coalesce ~256 ms per streaming request
+        self.BATCH_SECONDS = 0.25  # Never hold a partial batch longer than this
+        self.SILENCE_RMS = 150  # Analysis windows quieter than this (int16 units) are skipped
+        self.DEBUG = False  # Per-request/per-response logging in the streaming hot path
         
         # Threading and control
         self.is_recording = False
-        self.audio_queue = queue.Queue()
-        self.audio_buffer = deque()  # Store audio for speaker diarization
-        self.buffer_lock = threading.Lock()  # Lock for thread-safe buffer access
+        # ~2 s of audio; the oldest chunk is dropped when streaming falls behind
+        self.audio_queue = queue.Queue(maxsize=int(2 * self.RATE / self.CHUNK))
+        # Preallocated ring of raw PCM for speaker diarization, rounded up to a
+        # power of two so ring positions are a bitmask instead of a modulo
+        ring_size = 1 << (self.RATE * self.MAX_BUFFER_SECONDS - 1).bit_length()
+        self._ring = np.zeros(ring_size, dtype=np.int16)
+        self._ring_mask = ring_size - 1
+        # Single producer (audio callback) / single consumer, no lock needed:
+        # each index is a monotonic sample count written by one side only
+        self._w_idx = 0  # Samples written so far (audio callback only)
+        self._r_idx = 0  # Oldest sample still readable (reset_audio_buffer only)
         self.pyaudio_instance = None
         self.stream = None
         self.transcription_thread = None
         self.speaker_analysis_thread = None
+        self._gui_queue = queue.Queue()  # Widget updates from worker threads, applied on the Tk thread
         
         # Speaker diarization settings
         self.buffer_duration = 10  # seconds
         self.last_speaker_analysis = 0
         self.speaker_segments = []
+        # Speaker counts of the last few analyses; a run of 1s means a monologue
+        self._recent_speaker_counts = deque(maxlen=5)
+        self._last_speaker = None
+        self._monologue_skips = 0
+        self.MAX_MONOLOGUE_SKIPS = 2  # Skipped windows between re-checks during a monologue
         
         # Google Cloud Speech client
         self.speech_client = None
@@ -54,24 +72,6 @@ class MicrophoneStreamingWithSpeakers:
         # Initialize speech client after GUI is ready
         self.setup_speech_client()
         
-    def get_beta_api_credentials(self):
-        """Get credentials for beta API authentication"""
-        try:
-            service_account_path = "voice-sun-1-67f7efc777f3.json"
-            if os.path.exists(service_account_path):
-                credentials = service_account.Credentials.from_service_account_file(
-                    service_account_path,
-                    scopes=['https://www.googleapis.com/auth/cloud-platform']
-                )
-                credentials.refresh(Request())
-                return credentials.token
-            else:
-                self.log_message("❌ Service account file not found!")
-                return None
-        except Exception as e:
-            self.log_message(f"❌ Error getting beta API credentials: {e}")
-            return None
-        
     def setup_speech_client(self):
         """Initialize Google Cloud Speech client with service account authentication"""
         try:
@@ -99,7 +99,7 @@ class MicrophoneStreamingWithSpeakers:
         # Title
         title_label = tk.Label(
             self.root, 
-            text="🎤 Real-time Speech with Enhanced Speaker ID (Beta API)", 
+            text="🎤 Real-time Speech with Enhanced Speaker ID", 
             font=("Arial", 16, "bold"),
             bg="#f0f0f0",
             fg="#333"
@@ -241,21 +241,60 @@ class MicrophoneStreamingWithSpeakers:
         )
         self.log_text.pack(fill=tk.X, padx=20, pady=(0, 20))
         
+        # Worker threads never touch widgets; queued updates are applied here
+        self.root.after(50, self._drain_gui_queue)
+        
     def log_message(self, message):
-        """Add message to log display"""
+        """Queue message for the log display (safe from any thread)"""
         timestamp = time.strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
         
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self._gui_queue.put(("log", log_entry))
         print(log_entry.strip())  # Also print to console
         
     def add_transcription(self, text, is_final=False):
-        """Add transcription to real-time display"""
+        """Queue transcription for the real-time display (safe from any thread)"""
         # Debug: Log what we're adding
-        self.log_message(f"🔍 Adding transcription: '{text}' (final: {is_final})")
+        if self.DEBUG:
+            self.log_message(f"🔍 Adding transcription: '{text}' (final: {is_final})")
+        self._gui_queue.put(("transcript", (text, is_final)))
+        
+    def add_speaker_analysis(self, analysis_text):
+        """Queue speaker analysis for the speaker tab (safe from any thread)"""
+        self._gui_queue.put(("speaker", analysis_text))
         
+    def set_speaker_status(self, text, fg):
+        """Queue a speaker status label update (safe from any thread)"""
+        self._gui_queue.put(("speaker_status", (text, fg)))
+        
+    def _drain_gui_queue(self, max_items=50):
+        """Apply queued widget updates on the Tk thread, then reschedule"""
+        log_lines = []
+        for _ in range(max_items):
+            try:
+                kind, payload = self._gui_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                log_lines.append(payload)
+            elif kind == "transcript":
+                self.show_transcription(*payload)
+            elif kind == "speaker":
+                self.show_speaker_analysis(payload)
+            elif kind == "speaker_status":
+                text, fg = payload
+                self.speaker_status_label.config(text=text, fg=fg)
+            elif kind == "stop" and self.is_recording:
+                self.stop_recording()
+                
+        if log_lines:
+            self.log_text.insert(tk.END, "".join(log_lines))
+            self.log_text.see(tk.END)
+            
+        self.root.after(50, self._drain_gui_queue)
+        
+    def show_transcription(self, text, is_final):
+        """Add transcription to real-time display (Tk thread only)"""
         if is_final:
             # Remove any previous interim result
             current_content = self.transcript_text.get("end-2l", "end-1l").strip()
@@ -278,23 +317,20 @@ class MicrophoneStreamingWithSpeakers:
             self.transcript_text.insert(tk.END, f"🔄 {text}\n")
         
         self.transcript_text.see(tk.END)
-        self.root.update_idletasks()
         
-    def add_speaker_analysis(self, analysis_text):
-        """Add speaker analysis to speaker tab"""
+    def show_speaker_analysis(self, analysis_text):
+        """Add speaker analysis to speaker tab (Tk thread only)"""
         timestamp = time.strftime("%H:%M:%S")
         self.speaker_text.insert(tk.END, f"[{timestamp}] {analysis_text}\n")
         self.speaker_text.insert(tk.END, "-" * 60 + "\n")
         self.speaker_text.see(tk.END)
-        self.root.update_idletasks()
         
     def clear_transcription(self):
         """Clear both transcription displays"""
         self.transcript_text.delete(1.0, tk.END)
         self.speaker_text.delete(1.0, tk.END)
         self.speaker_segments.clear()
-        with self.buffer_lock:
-            self.audio_buffer.clear()
+        self.reset_audio_buffer()
         self.log_message("🗑️ All transcriptions cleared")
         
     def toggle_recording(self):
@@ -332,8 +368,7 @@ class MicrophoneStreamingWithSpeakers:
             self.stream.start_stream()
             
             # Clear audio buffer with thread safety
-            with self.buffer_lock:
-                self.audio_buffer.clear()
+            self.reset_audio_buffer()
             self.last_speaker_analysis = time.time()
             
             # Update GUI
@@ -389,11 +424,7 @@ class MicrophoneStreamingWithSpeakers:
             self.pyaudio_instance.terminate()
             
         # Clear the audio queue
-        while not self.audio_queue.empty():
-            try:
-                self.audio_queue.get_nowait()
-            except queue.Empty:
-                break
+        self.clear_audio_queue()
             
         # Update GUI
         self.toggle_button.config(
@@ -412,22 +443,102 @@ class MicrophoneStreamingWithSpeakers:
         self.log_message("🛑 Recording stopped")
         
         # Perform final speaker analysis on remaining buffer
-        with self.buffer_lock:
-            has_buffer = bool(self.audio_buffer)
-        
-        if has_buffer:
+        if self._w_idx > self._r_idx:
             self.log_message("🔄 Processing final audio buffer for speakers...")
-            self.process_speaker_diarization()
+            # Off the Tk thread so the window keeps repainting during the recognize() call
+            threading.Thread(
+                target=self.process_speaker_diarization, kwargs={"final": True}, daemon=True
+            ).start()
         
     def audio_callback(self, in_data, frame_count, time_info, status):
         """Callback function for audio stream"""
         if self.is_recording:
-            self.audio_queue.put(in_data)
-            # Also store in buffer for speaker analysis with thread safety
-            with self.buffer_lock:
-                self.audio_buffer.append((time.time(), in_data))
+            try:
+                self.audio_queue.put_nowait(in_data)
+            except queue.Full:
+                # Keep latency bounded: drop the oldest chunk instead of blocking
+                try:
+                    self.audio_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self.audio_queue.put_nowait(in_data)
+            # Also store in buffer for speaker analysis
+            samples = np.frombuffer(in_data, dtype=np.int16)
+            ring = self._ring
+            w = self._w_idx
+            pos = w & self._ring_mask
+            end = pos + samples.size
+            if end <= ring.size:
+                ring[pos:end] = samples
+            else:
+                # Wrap around: fill the tail, then continue from the start
+                split = ring.size - pos
+                ring[pos:] = samples[:split]
+                ring[:end - ring.size] = samples[split:]
+            self._w_idx = w + samples.size  # Publish last, after the samples are in place
         return (None, pyaudio.paContinue)
+    
+    def clear_audio_queue(self):
+        """Drop all queued streaming chunks in one step"""
+        # Draining with get_nowait() can chase a queue the callback keeps refilling
+        with self.audio_queue.mutex:
+            self.audio_queue.queue.clear()
+            self.audio_queue.not_full.notify_all()
+    
+    def reset_audio_buffer(self):
+        """Discard all buffered audio"""
+        self._r_idx = self._w_idx
+        self._recent_speaker_counts.clear()
+        self._monologue_skips = 0
+    
+    def get_recent_audio(self, seconds):
+        """Copy the last `seconds` of buffered samples out of the ring as int16"""
+        ring = self._ring
+        w = self._w_idx  # Snapshot the producer index once
+        start = max(self._r_idx, w - int(seconds * self.RATE), w - ring.size)
+        pos, end = start & self._ring_mask, w & self._ring_mask
+        if pos + (w - start) <= ring.size:
+            return ring[pos:pos + (w - start)].copy()
+        return np.concatenate((ring[pos:], ring[:end]))
                 
+    def request_generator(self):
+        """Yield batched StreamingRecognizeRequests from the audio queue while recording"""
+        # Bind hot lookups once; the loop runs for the whole streaming session
+        get = self.audio_queue.get
+        make_request = speech.StreamingRecognizeRequest
+        monotonic = time.monotonic
+        batch_bytes = self.BATCH_BYTES
+        batch_seconds = self.BATCH_SECONDS
+        debug = self.DEBUG
+        
+        request_count = 0
+        buf = bytearray()
+        while self.is_recording:
+            try:
+                # Get audio data from queue with timeout
+                buf += get(timeout=0.5)  # Shorter timeout
+            except queue.Empty:
+                # Continue but don't send empty requests for streaming
+                continue
+            
+            # Batch several chunks into one request, bounded by size and time
+            deadline = monotonic() + batch_seconds
+            while len(buf) < batch_bytes:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    buf += get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            request_count += 1
+            if debug and request_count % 50 == 0:  # Log every 50 requests
+                self.log_message(f"🔍 Sent {request_count} audio requests to streaming API")
+            
+            yield make_request(audio_content=bytes(buf))
+            buf.clear()
+            
     def transcription_worker(self):
         """Worker thread for handling Google Cloud Speech streaming (real-time)"""
         retry_count = 0
@@ -459,28 +570,10 @@ class MicrophoneStreamingWithSpeakers:
                 
                 self.log_message("🚀 Starting real-time streaming recognition...")
                 
-                # Create the generator function for requests
-                def request_generator():
-                    # Subsequent requests contain audio data
-                    request_count = 0
-                    while self.is_recording:
-                        try:
-                            # Get audio data from queue with timeout
-                            chunk = self.audio_queue.get(timeout=0.5)  # Shorter timeout
-                            request_count += 1
-
-                            if request_count % 50 == 0:  # Log every 50 requests
-                                self.log_message(f"🔍 Sent {request_count} audio requests to streaming API")
-                            
-                            yield speech.StreamingRecognizeRequest(audio_content=chunk)
-                        except queue.Empty:
-                            # Continue but don't send empty requests for streaming
-                            continue
-                
                 # Perform streaming recognition
                 responses = self.speech_client.streaming_recognize(
                     config=streaming_config,
-                    requests=request_generator()
+                    requests=self.request_generator()
                 )
                 
                 self.log_message("✅ Streaming recognition connected, listening for responses...")
@@ -495,21 +588,23 @@ class MicrophoneStreamingWithSpeakers:
                         
                     # Debug: Log when we receive a response
                     if response.results:
-                        self.log_message(f"🔍 Received streaming response with {len(response.results)} results")
+                        if self.DEBUG:
+                            self.log_message(f"🔍 Received streaming response with {len(response.results)} results")
                         
                         for result in response.results:
                             transcript = result.alternatives[0].transcript
                             confidence = result.alternatives[0].confidence if result.alternatives[0].confidence else 0.0
                             
                             # Debug: Log transcript details
-                            self.log_message(f"🔍 Transcript: '{transcript}' (final: {result.is_final})")
+                            if self.DEBUG:
+                                self.log_message(f"🔍 Transcript: '{transcript}' (final: {result.is_final})")
                             
                             if result.is_final:
                                 self.log_message(f"✅ Final: {transcript} (confidence: {confidence:.2f})")
                                 self.add_transcription(transcript, is_final=True)
                             else:
                                 self.add_transcription(transcript, is_final=False)
-                    else:
+                    elif self.DEBUG:
                         # Empty response - log occasionally
                         if response_count % 20 == 0:
                             self.log_message(f"🔍 Empty response #{response_count} received (waiting for speech)")
@@ -526,18 +621,15 @@ class MicrophoneStreamingWithSpeakers:
                     retry_count += 1
                     if retry_count < max_retries:
                         # Clear the audio queue and restart
-                        while not self.audio_queue.empty():
-                            try:
-                                self.audio_queue.get_nowait()
-                            except queue.Empty:
-                                break
+                        self.clear_audio_queue()
                         time.sleep(1)
                         continue
                 
                 if self.is_recording:
                     self.log_message(f"🛑 Stopping recording due to transcription error (retry {retry_count}/{max_retries})")
                     if retry_count >= max_retries:
-                        self.stop_recording()
+                        # stop_recording joins this thread, so it has to run on the Tk thread
+                        self._gui_queue.put(("stop", None))
                 break
                 
     def speaker_analysis_worker(self):
@@ -548,12 +640,10 @@ class MicrophoneStreamingWithSpeakers:
                 
                 # Check if it's time for speaker analysis
                 if current_time - self.last_speaker_analysis >= self.buffer_duration:
-                    with self.buffer_lock:
-                        buffer_size = len(self.audio_buffer)
-                        has_buffer = bool(self.audio_buffer)
+                    buffered_seconds = min(self._w_idx - self._r_idx, self._ring.size) / self.RATE
                     
-                    if has_buffer:
-                        self.log_message(f"🔄 Analyzing speakers (buffer: {buffer_size} chunks)...")
+                    if buffered_seconds:
+                        self.log_message(f"🔄 Analyzing speakers (buffer: {buffered_seconds:.1f}s)...")
                         self.process_speaker_diarization()
                         self.last_speaker_analysis = current_time
                 
@@ -562,284 +652,232 @@ class MicrophoneStreamingWithSpeakers:
             except Exception as e:
                 self.log_message(f"❌ Speaker analysis error: {e}")
                 
-    def process_speaker_diarization(self):
-        """Process only the recent audio segment for speaker diarization using Beta API"""
+    def show_vad_segments(self, voiced_mask, duration, streak):
+        """Report voice-activity segments for a window analysed without recognize()"""
+        # Rising/falling edges of the voiced mask give [start, end) frame runs
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], voiced_mask, [False])).astype(np.int8)))
+        frame_seconds = self.CHUNK / self.RATE
+        lines = [
+            "🎤 Speaker Analysis Results (VAD only, recognize() skipped):",
+            f"📊 Duration: {duration:.1f} seconds (recent segment)",
+            f"👤 The last {streak} analyses found one speaker (last: Speaker {self._last_speaker}); "
+            "speakers in this window are not verified",
+            f"📝 Voice activity segments: {edges.size // 2}",
+            "",
+        ]
+        for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            lines.append(f"[{start * frame_seconds:.1f}-{end * frame_seconds:.1f}s] Voice activity")
+        self.add_speaker_analysis("\n".join(lines) + "\n")
+        
+    def process_speaker_diarization(self, final=False):
+        """Process only the recent audio segment for speaker diarization"""
         try:
-            # Calculate how many chunks represent the analysis duration
-            chunks_per_second = self.RATE / self.CHUNK
-            max_chunks = int(self.buffer_duration * chunks_per_second)
-            
-            # Create a safe copy of only the recent audio segment
-            with self.buffer_lock:
-                if not self.audio_buffer:
-                    return
-                
-                # Get only the most recent chunks (last N seconds)
-                if len(self.audio_buffer) > max_chunks:
-                    # Take only the last max_chunks
-                    recent_buffer = list(self.audio_buffer)[-max_chunks:]
-                else:
-                    # Take all available chunks if less than max
-                    recent_buffer = list(self.audio_buffer)
-                
-                self.log_message(f"🔍 Processing last {len(recent_buffer)} chunks (target: {max_chunks} for {self.buffer_duration}s)")
-                
-            # Create temporary WAV file from recent buffer only
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_filename = temp_file.name
-                
-            # Write only recent audio buffer to WAV file
-            with wave.open(temp_filename, 'wb') as wf:
-                wf.setnchannels(self.CHANNELS)
-                wf.setsampwidth(self.pyaudio_instance.get_sample_size(self.FORMAT))
-                wf.setframerate(self.RATE)
-                
-                # Write only the recent buffered audio
-                for _, audio_data in recent_buffer:
-                    wf.writeframes(audio_data)
-            
-            # Check the created file
-            with wave.open(temp_filename, 'rb') as wf:
-                duration = wf.getnframes() / wf.getframerate()
-                self.log_message(f"📊 Created audio file: {duration:.1f}s, {wf.getframerate()}Hz, {wf.getnchannels()}ch")
-            
-            # Check if audio is too long for sync API (1 minute limit)
-            if duration > 58:  # Leave 2 seconds buffer
-                self.log_message(f"⚠️ Audio too long ({duration:.1f}s) for sync API, skipping this segment")
-                os.unlink(temp_filename)
-                
-                # Clear most of the buffer but keep some recent audio
-                with self.buffer_lock:
-                    recent_chunks = int(30 * self.RATE / self.CHUNK)  # Keep last 30 seconds
-                    if len(self.audio_buffer) > recent_chunks:
-                        # Remove old audio, keep recent
-                        for _ in range(len(self.audio_buffer) - recent_chunks):
-                            self.audio_buffer.popleft()
-                
-                self.speaker_status_label.config(text="👥 Speaker analysis: Active (Beta API)", fg="blue")
+            # Create a safe copy of only the recent audio segment (last N seconds)
+            recent_audio = self.get_recent_audio(self.buffer_duration)
+            if not recent_audio.size:
                 return
             
-            # Get beta API credentials
-            access_token = self.get_beta_api_credentials()
-            if not access_token:
-                self.log_message("❌ Failed to get beta API credentials")
+            # LINEAR16 is sent as raw PCM, so the duration follows from the sample count
+            duration = recent_audio.size / (self.RATE * self.CHANNELS)
+            self.log_message(f"🔍 Processing last {duration:.1f}s of audio (target: {self.buffer_duration}s)")
+            
+            # Don't pay for a recognize() call on a window of silence
+            rms = float(np.sqrt(np.mean(np.square(recent_audio, dtype=np.float32))))
+            if rms < self.SILENCE_RMS:
+                self.log_message(f"🔇 Silent window (RMS {rms:.0f}) - skipping speaker analysis")
                 return
             
-            # Read and encode audio file
-            with open(temp_filename, "rb") as audio_file:
-                audio_content = base64.b64encode(audio_file.read()).decode('utf-8')
+            # Per-CHUNK RMS drives both the VAD-only path and the silence trim below
+            frame_count = recent_audio.size // self.CHUNK
+            frame_rms = np.sqrt(np.mean(np.square(
+                recent_audio[:frame_count * self.CHUNK].reshape(-1, self.CHUNK), dtype=np.float32
+            ), axis=1))
+            voiced_mask = frame_rms >= self.SILENCE_RMS
+            
+            # During a monologue, replace most recognize() calls with on-device VAD segments,
+            # but still re-check periodically. The final flush always runs a real analysis.
+            counts = self._recent_speaker_counts
+            if (not final and len(counts) == counts.maxlen and all(c == 1 for c in counts)
+                    and self._monologue_skips < self.MAX_MONOLOGUE_SKIPS):
+                self._monologue_skips += 1
+                self.show_vad_segments(voiced_mask, duration, counts.maxlen)
+                self.log_message("👤 Single speaker streak - VAD only for this window, recognize() skipped")
+                return
+            self._monologue_skips = 0
+            
+            # Trim leading/trailing silence, keeping one frame of margin
+            voiced = np.flatnonzero(voiced_mask)
+            trim_offset = 0.0  # Seconds cut from the front, added back to word times
+            if voiced.size:
+                first = max(int(voiced[0]) - 1, 0)
+                last = int(voiced[-1]) + 2
+                end = recent_audio.size if last >= frame_count else last * self.CHUNK
+                trim_offset = first * self.CHUNK / self.RATE
+                recent_audio = recent_audio[first * self.CHUNK:end]
             
             # Get current language setting
             current_language = self.language_var.get()
-            self.log_message(f"🌐 Beta API using language: {current_language}")
-            
-            # Prepare beta API request using the working configuration
-            url = "https://speech.googleapis.com/v1p1beta1/speech:recognize"
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json',
-            }
-            
-            request_body = {
-                "audio": {
-                    "content": audio_content
-                },
-                "config": {
-                    "enableAutomaticPunctuation": True,
-                    "enableSpeakerDiarization": True,
-                    "encoding": "LINEAR16",
-                    "sampleRateHertz": self.RATE,  # Add sample rate for microphone audio
-                    "languageCode": current_language,  # Use current language setting
-                    "model": "default",
-                    "diarizationConfig": {
-                        "enableSpeakerDiarization": True,
-                        "minSpeakerCount": 1,
-                        "maxSpeakerCount": 4  # Allow up to 4 speakers, let API auto-detect
-                    }
-                }
-            }
+            self.log_message(f"🌐 Speaker analysis using language: {current_language}")
+            
+            config = speech.RecognitionConfig(
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=self.RATE,  # Add sample rate for microphone audio
+                language_code=current_language,  # Use current language setting
+                enable_automatic_punctuation=True,
+                model="default",
+                diarization_config=speech.SpeakerDiarizationConfig(
+                    enable_speaker_diarization=True,
+                    min_speaker_count=1,
+                    max_speaker_count=4,  # Allow up to 4 speakers, let API auto-detect
+                ),
+            )
             
             # Update status
-            self.speaker_status_label.config(text="👥 Analyzing speakers (Beta API)...", fg="orange")
-            self.root.update_idletasks()
-            
-            # Make beta API call
-            response = requests.post(url, headers=headers, data=json.dumps(request_body))
+            self.set_speaker_status("👥 Analyzing speakers...", "orange")
             
-            if response.status_code != 200:
-                error_details = ""
-                try:
-                    error_data = response.json()
-                    error_details = f": {error_data.get('error', {}).get('message', 'Unknown error')}"
-                except:
-                    error_details = f": {response.text[:200]}"
-                
-                self.log_message(f"❌ Beta API request failed: {response.status_code}{error_details}")
-                self.speaker_status_label.config(text="👥 Speaker analysis: Error", fg="red")
-                return
-            
-            result = response.json()
+            # Raw PCM goes over the existing gRPC channel, no base64/JSON encoding
+            response = self.speech_client.recognize(
+                config=config,
+                audio=speech.RecognitionAudio(content=recent_audio.tobytes()),
+                timeout=30,
+            )
             
-            # Process beta API results
-            if 'results' not in result or not result['results']:
+            # Process recognition results
+            if not response.results:
                 self.log_message("⚠️ No speech detected in this segment")
-                self.speaker_status_label.config(text="👥 Speaker analysis: No speech", fg="gray")
+                self.set_speaker_status("👥 Speaker analysis: No speech", "gray")
                 return
             
-            # Extract word-level speaker information
+            # Extract word-level speaker information as (word, speaker_tag, start, end) tuples,
+            # reading the raw protobuf once (proto-plus wrappers re-marshal on every access)
             words_info = []
-            for result_item in result['results']:
-                if 'alternatives' in result_item and result_item['alternatives']:
-                    alternative = result_item['alternatives'][0]
-                    if 'words' in alternative:
-                        words_info.extend(alternative['words'])
+            for result_item in speech.RecognizeResponse.pb(response).results:
+                if result_item.alternatives:
+                    for w in result_item.alternatives[0].words:
+                        # Only the diarized final result tags its words; the earlier results
+                        # repeat them with speaker_tag 0, which would win the dedup below
+                        if not w.speaker_tag:
+                            continue
+                        words_info.append((
+                            w.word,
+                            w.speaker_tag,
+                            trim_offset + w.start_time.seconds + w.start_time.nanos * 1e-9,
+                            trim_offset + w.end_time.seconds + w.end_time.nanos * 1e-9,
+                        ))
             
             if not words_info:
                 self.log_message("⚠️ No speaker diarization data found")
                 return
             
             # Debug: Log word-level speaker information to understand the issue
-            self.log_message(f"🔍 Debug: Found {len(words_info)} words with speaker tags")
-            for i, word_info in enumerate(words_info[:5]):  # Show first 5 words for debugging
-                word = word_info.get('word', '')
-                speaker_tag = word_info.get('speakerTag', 1)
-                start_time = word_info.get('startTime', '0s')
-                self.log_message(f"🔍 Word {i+1}: '{word}' -> Speaker {speaker_tag} at {start_time}")
+            if self.DEBUG:
+                self.log_message(f"🔍 Debug: Found {len(words_info)} words with speaker tags")
+                for i, (word, speaker_tag, start_time, _) in enumerate(words_info[:5]):  # Show first 5 words for debugging
+                    self.log_message(f"🔍 Word {i+1}: '{word}' -> Speaker {speaker_tag} at {start_time:.2f}s")
             
             # Filter out duplicate words with same timing but different speakers
             # This happens when the API incorrectly assigns the same word to multiple speakers
-            filtered_words = []
-            seen_words = {}  # Track word+time combinations
+            # Re-assigning an existing key keeps its position, so time order is preserved
+            best = {}  # (word, start_time) -> word_info with the lowest speaker tag
             
             for word_info in words_info:
-                word = word_info.get('word', '')
-                start_time = word_info.get('startTime', '0s')
-                speaker_tag = word_info.get('speakerTag', 1)
-                
-                # Create a unique key for this word at this time
-                word_time_key = f"{word}_{start_time}"
-                
-                if word_time_key not in seen_words:
-                    # First occurrence of this word at this time
-                    seen_words[word_time_key] = word_info
-                    filtered_words.append(word_info)
-                else:
-                    # Duplicate detected - keep the one with lower speaker tag (more reliable)
-                    existing_speaker = seen_words[word_time_key].get('speakerTag', 1)
-                    if speaker_tag < existing_speaker:
-                        # Replace with lower speaker tag
-                        seen_words[word_time_key] = word_info
-                        # Remove the old one and add the new one
-                        filtered_words = [w for w in filtered_words if not (
-                            w.get('word') == word and w.get('startTime') == start_time
-                        )]
-                        filtered_words.append(word_info)
-            
-            self.log_message(f"🔍 After filtering: {len(filtered_words)} unique words (removed {len(words_info) - len(filtered_words)} duplicates)")
-            words_info = filtered_words
+                key = (word_info[0], word_info[2])
+                current = best.get(key)
+                if current is None or word_info[1] < current[1]:
+                    # First occurrence, or a duplicate with lower speaker tag (more reliable)
+                    best[key] = word_info
+            
+            self.log_message(f"🔍 After filtering: {len(best)} unique words (removed {len(words_info) - len(best)} duplicates)")
             
             # Group words by speaker for conversation view
-            conversations = []
+            # Conversation segments as parallel arrays: speaker, text, start, end
+            seg_speakers = []
+            seg_texts = []
+            seg_starts = []
+            seg_ends = []
             current_speaker = None
-            current_sentence = ""
+            current_words = []  # Joined once per segment instead of growing a str
+            add_word = current_words.append
             current_start_time = None
             current_end_time = None
             
-            for word_info in words_info:
-                word = word_info.get('word', '')
-                speaker_tag = word_info.get('speakerTag', 1)
-                start_time = float(word_info.get('startTime', '0s').rstrip('s'))
-                end_time = float(word_info.get('endTime', '0s').rstrip('s'))
-                
+            # Google returns words in time order and best keeps that order
+            for word, speaker_tag, start_time, end_time in best.values():
                 if current_speaker is None:
                     current_speaker = speaker_tag
                     current_start_time = start_time
                 
-                # If speaker changes or we detect end of sentence
-                if (speaker_tag != current_speaker or 
-                    word.endswith('.') or word.endswith('!') or word.endswith('?') or
-                    (start_time - current_end_time > 1.0 if current_end_time else False)):
+                # If speaker changes, we detect end of sentence, or there is a pause over 1 s
+                if (speaker_tag != current_speaker or
+                    word[-1:] in _SENT_END or
+                    (current_end_time is not None and start_time - current_end_time > 1.0)):
                     
-                    if current_sentence.strip():
-                        conversations.append({
-                            'speaker': current_speaker,
-                            'text': current_sentence.strip(),
-                            'start_time': current_start_time,
-                            'end_time': current_end_time
-                        })
+                    if current_words:
+                        seg_speakers.append(current_speaker)
+                        seg_texts.append(" ".join(current_words).strip())
+                        seg_starts.append(current_start_time)
+                        seg_ends.append(current_end_time)
                     
-                    current_sentence = ""
+                    current_words.clear()
                     current_speaker = speaker_tag
                     current_start_time = start_time
                 
-                current_sentence += word + " "
+                add_word(word)
                 current_end_time = end_time
             
             # Add the last sentence
-            if current_sentence.strip():
-                conversations.append({
-                    'speaker': current_speaker,
-                    'text': current_sentence.strip(),
-                    'start_time': current_start_time,
-                    'end_time': current_end_time
-                })
-            
-            # Format speaker analysis output
-            duration = len(recent_buffer) * self.CHUNK / self.RATE
-            unique_speakers = set(conv['speaker'] for conv in conversations)
-            
-            analysis_output = f"🎤 Speaker Analysis Results (Beta API):\n"
-            analysis_output += f"📊 Duration: {duration:.1f} seconds (recent segment)\n"
-            analysis_output += f"👥 Speakers detected: {len(unique_speakers)}\n"
-            analysis_output += f"📝 Conversation segments: {len(conversations)}\n\n"
+            if current_words:
+                seg_speakers.append(current_speaker)
+                seg_texts.append(" ".join(current_words).strip())
+                seg_starts.append(current_start_time)
+                seg_ends.append(current_end_time)
+            
+            # Per-speaker segment counts and speaking time, vectorized over the segments
+            durations = np.subtract(seg_ends, seg_starts)
+            unique_speakers, speaker_index, segment_counts = np.unique(
+                seg_speakers, return_inverse=True, return_counts=True
+            )
+            speaking_times = np.bincount(speaker_index, weights=durations, minlength=unique_speakers.size)
+            
+            # Format speaker analysis output, one entry per line
+            lines = [
+                "🎤 Speaker Analysis Results:",
+                f"📊 Duration: {duration:.1f} seconds (recent segment)",
+                f"👥 Speakers detected: {len(unique_speakers)}",
+                f"📝 Conversation segments: {len(seg_speakers)}",
+                "",
+            ]
             
             # Show conversation segments
-            for conv in conversations:
-                analysis_output += f"[{conv['start_time']:.1f}-{conv['end_time']:.1f}s] "
-                analysis_output += f"Speaker {conv['speaker']}: {conv['text']}\n"
+            for start_time, end_time, speaker, text in zip(seg_starts, seg_ends, seg_speakers, seg_texts):
+                lines.append(f"[{start_time:.1f}-{end_time:.1f}s] Speaker {speaker}: {text}")
             
             # Show speaker summary
-            analysis_output += f"\n� Speaker Summary:\n"
-            for speaker in sorted(unique_speakers):
-                speaker_segments = [conv for conv in conversations if conv['speaker'] == speaker]
-                total_time = sum(conv['end_time'] - conv['start_time'] for conv in speaker_segments)
-                analysis_output += f"Speaker {speaker}: {len(speaker_segments)} segments, {total_time:.1f}s speaking time\n"
-            
-            self.add_speaker_analysis(analysis_output)
-            self.log_message(f"✅ Beta API speaker analysis complete: {len(unique_speakers)} speakers, {len(conversations)} segments")
-            
-            # Clean up temporary file
-            os.unlink(temp_filename)
-            
-            # Trim the audio buffer to keep only recent audio (prevent memory buildup)
-            with self.buffer_lock:
-                # Keep only the last 30 seconds of audio to prevent memory issues
-                max_buffer_chunks = int(30 * self.RATE / self.CHUNK)  # 30 seconds
-                if len(self.audio_buffer) > max_buffer_chunks:
-                    # Remove old chunks, keep recent ones
-                    excess_chunks = len(self.audio_buffer) - max_buffer_chunks
-                    for _ in range(excess_chunks):
-                        self.audio_buffer.popleft()
-                    self.log_message(f"🧹 Trimmed buffer: removed {excess_chunks} old chunks, kept {len(self.audio_buffer)} recent ones")
-            
-            self.speaker_status_label.config(text="👥 Speaker analysis: Active (Beta API)", fg="blue")
+            lines.append("")
+            lines.append("� Speaker Summary:")
+            for speaker, segment_count, total_time in zip(
+                unique_speakers.tolist(), segment_counts.tolist(), speaking_times.tolist()
+            ):
+                lines.append(f"Speaker {speaker}: {segment_count} segments, {total_time:.1f}s speaking time")
+            
+            self.add_speaker_analysis("\n".join(lines) + "\n")
+            self.log_message(f"✅ Speaker analysis complete: {len(unique_speakers)} speakers, {len(seg_speakers)} segments")
+            
+            self._recent_speaker_counts.append(len(unique_speakers))
+            self._last_speaker = unique_speakers[-1].item() if len(unique_speakers) else None
+            
+            self.set_speaker_status("👥 Speaker analysis: Active", "blue")
             
         except Exception as e:
-            self.log_message(f"❌ Beta API speaker diarization error: {e}")
-            self.speaker_status_label.config(text="👥 Speaker analysis: Error", fg="red")
-            # Clean up temporary file on error
-            try:
-                if 'temp_filename' in locals():
-                    os.unlink(temp_filename)
-            except:
-                pass
+            self.log_message(f"❌ Speaker diarization error: {e}")
+            self.set_speaker_status("👥 Speaker analysis: Error", "red")
                 
     def run(self):
         """Start the GUI application"""
         self.log_message("🎉 Microphone Streaming with Speaker ID started!")
-        self.log_message("� Using Google Cloud Speech v1p1beta1 REST API for enhanced speaker diarization")
-        self.log_message("�💡 Click 'Start Recording' to begin real-time transcription")
-        self.log_message("👥 Speaker analysis will run every few seconds using Beta API")
+        self.log_message("👥 Using Google Cloud Speech recognize() with speaker diarization")
+        self.log_message("💡 Click 'Start Recording' to begin real-time transcription")
+        self.log_message("👥 Speaker analysis will run every few seconds on the recent audio")
         
         try:
             self.root.mainloop()
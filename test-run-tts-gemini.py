@@ -5,14 +5,16 @@ This script generates one Thai conversation audio file for testing purposes.
 **Prerequisites:**
 1. Install: pip install google-genai
 2. Set GOOGLE_API_KEY environment variable
-3. Run: python thai_conversation_test.py
+3. Run: python test-run-tts-gemini.py [--count N]
 
-**Output:** thai_conversation_test.wav
+**Output:** thai_conversation_test.wav, or thai_conversation_test_1..N.wav with --count
 """
 
 import os
 import sys
+import argparse
 import wave
+import asyncio
 from google import genai
 from google.genai import types
 
@@ -22,39 +24,102 @@ def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2):
     
     Args:
         filename (str): Output filename
-        pcm (bytes): PCM audio data
+        pcm (bytes or iterable of bytes): PCM audio data, optionally in chunks
         channels (int): Number of audio channels (default: 1)
         rate (int): Sample rate (default: 24000)
         sample_width (int): Sample width in bytes (default: 2)
     """
-    with wave.open(filename, "wb") as wf:
+    # Large buffer so the PCM payload goes out in a few write() calls
+    with open(filename, "wb", buffering=1 << 20) as f, wave.open(f, "wb") as wf:
         wf.setnchannels(channels)
         wf.setsampwidth(sample_width)
         wf.setframerate(rate)
-        wf.writeframes(pcm)
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            pcm = (pcm,)
+        # Header lengths are patched once when the writer closes
+        for chunk in pcm:
+            wf.writeframesraw(chunk)
+
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+
+# Thai conversation prompt with Southern dialect instruction
+THAI_PROMPT = """Please generate text-to-speech for the following Thai dialect conversation between Speaker 1 and Speaker 2:
+
+Speaker 1: สวัสดีสบายดีไหม
+Speaker 2: สบายดี คุณกำลังทำอะไรอยู่หรอ
+
+Please use Thai language pronunciation and intonation appropriate for Thai dialect."""
+
+def build_tts_config():
+    """
+    Build the two-speaker TTS request config (Aoede for Speaker 1, Kore for Speaker 2).
+    """
+    return types.GenerateContentConfig(
+        response_modalities=["AUDIO"],
+        speech_config=types.SpeechConfig(
+            multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
+                speaker_voice_configs=[
+                    types.SpeakerVoiceConfig(
+                        speaker='Speaker 1',
+                        voice_config=types.VoiceConfig(
+                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                voice_name='Aoede',  # Female voice for Speaker 1
+                            )
+                        )
+                    ),
+                    types.SpeakerVoiceConfig(
+                        speaker='Speaker 2',
+                        voice_config=types.VoiceConfig(
+                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                voice_name='Kore',  # Different female voice for Speaker 2
+                            )
+                        )
+                    ),
+                ]
+            )
+        )
+    )
+
+def get_client():
+    """
+    Create a genai client from GOOGLE_API_KEY, or return None if it is not set.
+    """
+    api_key = os.environ.get('GOOGLE_API_KEY')
+    if not api_key:
+        print("Error: GOOGLE_API_KEY environment variable is not set.")
+        print("Please set your Google AI Studio API key:")
+        print('$env:GOOGLE_API_KEY="your_api_key_here"')
+        return None
+    return genai.Client(api_key=api_key)
+
+def save_audio_response(response, output_filename):
+    """
+    Save the audio parts of a TTS response to a WAV file. Returns True on success.
+    """
+    if response.candidates and response.candidates[0].content.parts:
+        # Audio may be split across several parts; write them in order without joining
+        audio_chunks = []
+        for part in response.candidates[0].content.parts:
+            try:
+                audio_chunks.append(part.inline_data.data)
+            except AttributeError:
+                continue  # Text or other non-audio part (inline_data is None)
+        if audio_chunks:
+            wave_file(output_filename, audio_chunks)
+            print(f"✓ Thai conversation saved to: {output_filename}")
+            return True
+    
+    print(f"✗ No audio data found in response for: {output_filename}")
+    return False
 
 def generate_thai_conversation(output_filename="thai_conversation_test.wav"):
     """
     Generates a Thai dialect conversation using different voices.
     """
     try:
-        # Check if API key is set
-        api_key = os.environ.get('GOOGLE_API_KEY')
-        if not api_key:
-            print("Error: GOOGLE_API_KEY environment variable is not set.")
-            print("Please set your Google AI Studio API key:")
-            print('$env:GOOGLE_API_KEY="your_api_key_here"')
+        client = get_client()
+        if client is None:
             return False
-        
-        client = genai.Client(api_key=api_key)
-        
-        # Thai conversation prompt with Southern dialect instruction
-        prompt = """Please generate text-to-speech for the following Thai dialect conversation between Speaker 1 and Speaker 2:
-
-Speaker 1: สวัสดีสบายดีไหม
-Speaker 2: สบายดี คุณกำลังทำอะไรอยู่หรอ
-
-Please use Thai language pronunciation and intonation appropriate for Thai dialect."""
 
         print("Generating Thai conversation...")
         print("Thai text:")
@@ -62,52 +127,66 @@ Please use Thai language pronunciation and intonation appropriate for Thai diale
         print("Speaker 2: สบายดี คุณกำลังทำอะไรอยู่หรอ")
         
         response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-tts",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
-                        speaker_voice_configs=[
-                            types.SpeakerVoiceConfig(
-                                speaker='Speaker 1',
-                                voice_config=types.VoiceConfig(
-                                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                        voice_name='Aoede',  # Female voice for Speaker 1
-                                    )
-                                )
-                            ),
-                            types.SpeakerVoiceConfig(
-                                speaker='Speaker 2',
-                                voice_config=types.VoiceConfig(
-                                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                        voice_name='Kore',  # Different female voice for Speaker 2
-                                    )
-                                )
-                            ),
-                        ]
-                    )
-                )
-            )
+            model=TTS_MODEL,
+            contents=THAI_PROMPT,
+            config=build_tts_config(),
         )
-
-        # Extract and save audio data
-        if response.candidates and response.candidates[0].content.parts:
-            audio_part = response.candidates[0].content.parts[0]
-            if hasattr(audio_part, 'inline_data') and audio_part.inline_data:
-                data = audio_part.inline_data.data
-                wave_file(output_filename, data)
-                print(f"✓ Thai conversation saved to: {output_filename}")
-                return True
-        
-        print("✗ No audio data found in response")
-        return False
+        return save_audio_response(response, output_filename)
         
     except Exception as e:
         print(f"✗ Error during Thai speech generation: {e}")
         return False
 
+async def _generate_one(client, semaphore, output_filename):
+    """
+    Generate one conversation file on the async client, bounded by the semaphore.
+    """
+    async with semaphore:
+        response = await client.aio.models.generate_content(
+            model=TTS_MODEL,
+            contents=THAI_PROMPT,
+            config=build_tts_config(),
+        )
+    # Write in a worker thread so the other in-flight requests keep progressing
+    return await asyncio.to_thread(save_audio_response, response, output_filename)
+
+def generate_thai_conversations(output_filenames, max_concurrency=8):
+    """
+    Generate several Thai conversation files with concurrent requests.
+    
+    Args:
+        output_filenames (list): Output WAV filenames, one request each
+        max_concurrency (int): Maximum requests in flight (default: 8)
+    
+    Returns:
+        list: True/False per filename, in the same order
+    """
+    client = get_client()
+    if client is None:
+        return [False] * len(output_filenames)
+    
+    async def run_all():
+        semaphore = asyncio.Semaphore(max_concurrency)
+        return await asyncio.gather(
+            *(_generate_one(client, semaphore, filename) for filename in output_filenames),
+            return_exceptions=True,
+        )
+    
+    print(f"Generating {len(output_filenames)} Thai conversations (up to {max_concurrency} at a time)...")
+    results = []
+    for filename, result in zip(output_filenames, asyncio.run(run_all())):
+        if isinstance(result, Exception):
+            print(f"✗ Error during Thai speech generation for {filename}: {result}")
+            result = False
+        results.append(result)
+    return results
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Thai conversation TTS test audio")
+    parser.add_argument("--count", type=int, default=1,
+                        help="number of files to generate concurrently (default: 1)")
+    args = parser.parse_args()
+    
     # Check if API key is set up
     if not os.environ.get('GOOGLE_API_KEY'):
         print("❌ Error: GOOGLE_API_KEY environment variable is not set.")
@@ -118,20 +197,33 @@ if __name__ == "__main__":
     
     print("🇹🇭 Thai Conversation TTS Test")
     print("=" * 40)
-    print("Generating single Thai conversation audio file...")
-    print()
     
-    # Generate Thai conversation
-    success = generate_thai_conversation("thai_conversation_test.wav")
+    if args.count > 1:
+        # Batch: one request per file, run concurrently on the async client
+        filenames = [f"thai_conversation_test_{i}.wav" for i in range(1, args.count + 1)]
+        print(f"Generating {args.count} Thai conversation audio files...")
+        print()
+        results = generate_thai_conversations(filenames)
+        generated = [name for name, ok in zip(filenames, results) if ok]
+        success = len(generated) == len(filenames)
+    else:
+        print("Generating single Thai conversation audio file...")
+        print()
+        generated = ["thai_conversation_test.wav"]
+        success = generate_thai_conversation(generated[0])
     
     if success:
         print()
         print("🎉 Success!")
-        print("📁 Generated file: thai_conversation_test.wav")
+        for name in generated:
+            print(f"📁 Generated file: {name}")
         print("🔊 Contains Thai conversation between 2 speakers:")
         print("   Speaker 1 (Aoede): สวัสดีสบายดีไหม")
         print("   Speaker 2 (Kore): สบายดี คุณกำลังทำอะไรอยู่หรอ")
     else:
         print()
-        print("❌ Failed to generate audio file")
+        if args.count > 1:
+            print(f"❌ Generated {len(generated)} of {len(filenames)} audio files")
+        else:
+            print("❌ Failed to generate audio file")
         print("💡 Check your API key and quota status")
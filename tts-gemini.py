@@ -58,10 +58,15 @@ Please use Thai language pronunciation and intonation appropriate for Thai diale
 
         # Extract and save audio data
         if response.candidates and response.candidates[0].content.parts:
-            audio_part = response.candidates[0].content.parts[0]
-            if hasattr(audio_part, 'inline_data') and audio_part.inline_data:
-                data = audio_part.inline_data.data
-                wave_file(output_filename, data)
+            # Audio may be split across several parts; write them in order without joining
+            audio_chunks = []
+            for part in response.candidates[0].content.parts:
+                try:
+                    audio_chunks.append(part.inline_data.data)
+                except AttributeError:
+                    continue  # Text or other non-audio part (inline_data is None)
+            if audio_chunks:
+                wave_file(output_filename, audio_chunks)
                 print(f"✓ Thai conversation saved to: {output_filename}")
                 return True
         